@@ -1,30 +1,291 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, stream_with_context
 from flask_cors import CORS
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING, DESCENDING, IndexModel, ReturnDocument, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
 from werkzeug.security import generate_password_hash, check_password_hash
 from bson.objectid import ObjectId
+from bson import json_util
 import jwt
 import datetime
 import os
+import re
+import base64
+import csv
+import io
+import zlib
+import hashlib
+import math
+import time
+import threading
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from dateutil.relativedelta import relativedelta
+from cache import TTLCache, SingleFlightCache
+from metrics import Metrics, CommandMetrics
+from profiler import SlowQueryProfiler
+from json_provider import BSONJSONProvider
+from route_search import RouteGraph, SORT_KEYS as ITINERARY_SORT_KEYS
+from autocomplete import PrefixIndex, normalize_key
+from schedule_index import ScheduleIndex, flight_interval
+from pubsub import PollingFeed, PubSub
 
 app = Flask(__name__)
+app.json = BSONJSONProvider(app)  # Serializes ObjectId and datetime values, through orjson when available
 CORS(app)  # Enable CORS for Angular frontend
 
-# MongoDB connection
-client = MongoClient('mongodb://localhost:27017/')
-db = client['tunisair_db']
-users_collection = db['users']
-flights_collection = db['flights']
-planes_collection = db['planes']
-crews_collection = db['crews']
-promotions_collection = db['promotions']
-reservations_collection = db['reservations']
+# Per-route latency and MongoDB usage, exposed on /metrics
+request_metrics = Metrics()
+request_metrics.init_app(app)
+
+# Logs find/aggregate/count commands slower than SLOW_QUERY_MS with their explain plan
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+slow_query_profiler = SlowQueryProfiler(threshold_ms=SLOW_QUERY_MS,
+                                        explain=os.environ.get('SLOW_QUERY_EXPLAIN', 'true').lower() == 'true')
+
+# MongoDB connection settings; the client itself is created lazily in each process
+app.config.from_mapping(
+    MONGO_URI=os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'),
+    MONGO_DB_NAME=os.environ.get('MONGO_DB_NAME', 'tunisair_db'),
+    MONGO_MAX_POOL_SIZE=int(os.environ.get('MONGO_MAX_POOL_SIZE', 50)),
+    MONGO_MIN_POOL_SIZE=int(os.environ.get('MONGO_MIN_POOL_SIZE', 0)),
+    MONGO_SERVER_SELECTION_TIMEOUT_MS=int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000)),
+    MONGO_CONNECT_TIMEOUT_MS=int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000)),
+    MONGO_SOCKET_TIMEOUT_MS=int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', 30000)),
+    MONGO_WAIT_QUEUE_TIMEOUT_MS=int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 5000)),
+    MONGO_WRITE_CONCERN=os.environ.get('MONGO_WRITE_CONCERN'),  # e.g. 'majority' or '1'
+    MONGO_JOURNAL=os.environ.get('MONGO_JOURNAL'),
+)
+mongo_client = None
+mongo_client_pid = None
+mongo_collections = {}
+mongo_client_lock = threading.Lock()
+
+def get_client():
+    """Return this process's MongoClient, creating it on first use.
+
+    A client must not cross a fork: pre-forking servers import the app in the
+    master, so each worker builds its own client and connection pool here.
+    """
+    global mongo_client, mongo_client_pid
+    if mongo_client is not None and mongo_client_pid == os.getpid():
+        return mongo_client
+    with mongo_client_lock:
+        if mongo_client is None or mongo_client_pid != os.getpid():
+            options = {
+                'maxPoolSize': app.config['MONGO_MAX_POOL_SIZE'],
+                'minPoolSize': app.config['MONGO_MIN_POOL_SIZE'],
+                'serverSelectionTimeoutMS': app.config['MONGO_SERVER_SELECTION_TIMEOUT_MS'],
+                'connectTimeoutMS': app.config['MONGO_CONNECT_TIMEOUT_MS'],
+                'socketTimeoutMS': app.config['MONGO_SOCKET_TIMEOUT_MS'],
+                'waitQueueTimeoutMS': app.config['MONGO_WAIT_QUEUE_TIMEOUT_MS'],
+                'event_listeners': [CommandMetrics(request_metrics), slow_query_profiler]
+            }
+            if app.config['MONGO_WRITE_CONCERN']:
+                w = app.config['MONGO_WRITE_CONCERN']
+                options['w'] = int(w) if w.isdigit() else w
+            if app.config['MONGO_JOURNAL']:
+                options['journal'] = app.config['MONGO_JOURNAL'].lower() == 'true'
+            mongo_collections.clear()
+            mongo_client = MongoClient(app.config['MONGO_URI'], **options)
+            mongo_client_pid = os.getpid()
+        return mongo_client
+
+def get_db():
+    return get_client()[app.config['MONGO_DB_NAME']]
+
+class LazyCollection:
+    """Module-level collection handle resolved against this process's client on use."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __getattr__(self, attr):
+        collection = mongo_collections.get(self.name) if mongo_client_pid == os.getpid() else None
+        if collection is None:
+            collection = get_db()[self.name]
+            mongo_collections[self.name] = collection
+        return getattr(collection, attr)
+
+slow_query_profiler.bind(get_client)
+users_collection = LazyCollection('users')
+flights_collection = LazyCollection('flights')
+planes_collection = LazyCollection('planes')
+crews_collection = LazyCollection('crews')
+promotions_collection = LazyCollection('promotions')
+reservations_collection = LazyCollection('reservations')
+flight_stats_collection = LazyCollection('flight_stats_daily')
+cities_collection = LazyCollection('cities')
+app_state_collection = LazyCollection('app_state')  # One-off builds already run on this database
 
 # JWT configuration
 SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'your-secret-key')
 API_PREFIX = '/api'
 
+# Verified token payloads keyed by token digest, and public user profiles
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 10000))
+TOKEN_CACHE_TTL = int(os.environ.get('TOKEN_CACHE_TTL', 300))
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 10000))
+USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 300))
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+# Password hashing: werkzeug method string (e.g. 'scrypt:32768:8:1', 'pbkdf2:sha256:600000'),
+# run in a process pool so KDF calls do not tie up request workers (0 workers = inline).
+# Every server worker has its own pool, so by default the WEB_CONCURRENCY workers
+# split the CPUs between their pools (one hashing process each when it is unset)
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 0))
+PASSWORD_HASH_WORKERS = int(os.environ.get(
+    'PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY) if WEB_CONCURRENCY else 1))
+PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', PASSWORD_HASH_WORKERS * 4 or 1))
+PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+hash_pool = None
+hash_pool_pid = None
+hash_pool_lock = threading.Lock()
+hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_QUEUE)
+
+# Flight search pagination
+FLIGHT_SORT_FIELDS = ('price_numeric', 'duration', 'schedule')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Admin exports are written out one cursor batch at a time, imports one bulk_write at a time
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 1000))
+FILE_FORMATS = ('ndjson', 'csv')
+IMPORT_MODES = ('insert', 'upsert')
+
+# Response shapes, applied by the server (MongoDB 4.4+ expression projections)
+# so that documents come back ready to serialize
+FLIGHT_PROJECTION = {
+    '_id': {'$toString': '$_id'},
+    'number': 1,
+    'departure': 1,
+    'arrival': 1,
+    'plane': {'$ifNull': ['$plane', '']},
+    'crew': {'$ifNull': ['$crew', '']},
+    'schedule': 1,
+    'price': 1,
+    'price_numeric': {'$ifNull': ['$price_numeric', 0]},
+    'promotion': {'$ifNull': ['$promotion', '']},
+    'status': 1,
+    'class': {'$ifNull': ['$class', 'economique']},
+    'company': {'$ifNull': ['$company', 'Tunisair']},
+    'duration': {'$ifNull': ['$duration', 0]},
+    'escales': {'$ifNull': ['$escales', '0']},
+    'passengers': {'$ifNull': ['$passengers', 0]},
+    'capacity': {'$ifNull': ['$capacity', 0]}
+}
+PLANE_PROJECTION = {'_id': {'$toString': '$_id'}, 'model': 1, 'registration': 1, 'capacity': 1, 'available': 1}
+CREW_PROJECTION = {'_id': {'$toString': '$_id'}, 'name': 1, 'members': 1, 'mainRole': 1, 'available': 1}
+PROMOTION_PROJECTION = {
+    '_id': {'$toString': '$_id'},
+    'destination': 1,
+    'description': 1,
+    'image': 1,
+    'oldPrice': 1,
+    'newPrice': 1,
+    'discount': 1
+}
+# Flight fields joined into reservation lists
+FLIGHT_SUMMARY_PROJECTION = {
+    '_id': {'$toString': '$_id'},
+    'number': 1,
+    'departure': 1,
+    'arrival': 1,
+    'schedule': 1,
+    'price': 1,
+    'status': 1,
+    'company': {'$ifNull': ['$company', 'Tunisair']},
+    'duration': {'$ifNull': ['$duration', 0]},
+    'escales': {'$ifNull': ['$escales', '0']}
+}
+RESERVATION_PROJECTION = {
+    '_id': {'$toString': '$_id'},
+    'user_id': 1,
+    'flight_id': 1,
+    'passengers': 1,
+    'passengers_details': {'$ifNull': ['$passengers_details', []]},
+    'class': 1,
+    'total_price': 1,
+    'status': 1,
+    'created_at': 1,
+    'updated_at': 1
+}
+
+# Serialized /api/cities payload, refreshed on change or after the TTL (other workers' writes)
+CITY_CACHE_TTL = int(os.environ.get('CITY_CACHE_TTL', 60))
+city_cache = TTLCache(maxsize=1, ttl=CITY_CACHE_TTL)
+
+# Promotions indexed by destination, shared by pricing and /api/promotions
+PROMOTION_CACHE_TTL = int(os.environ.get('PROMOTION_CACHE_TTL', 60))
+promotion_cache = TTLCache(maxsize=1, ttl=PROMOTION_CACHE_TTL)
+
+# Fare calendars keyed by route, window and route version; any flight write on
+# a route bumps its version, retiring the entries computed before it
+CALENDAR_CACHE_SIZE = int(os.environ.get('CALENDAR_CACHE_SIZE', 5000))
+CALENDAR_CACHE_TTL = int(os.environ.get('CALENDAR_CACHE_TTL', 60))
+MAX_CALENDAR_DAYS = 15
+calendar_cache = TTLCache(maxsize=CALENDAR_CACHE_SIZE, ttl=CALENDAR_CACHE_TTL)
+
+# Serialized GET /api/flights results keyed by the normalized query and filed by
+# (departure, arrival) filter. Writes in this worker drop the matching entries
+# of the flight's route buckets only; the short TTL bounds how long other
+# workers' writes go unseen
+FLIGHT_SEARCH_CACHE_SIZE = int(os.environ.get('FLIGHT_SEARCH_CACHE_SIZE', 2000))
+FLIGHT_SEARCH_CACHE_TTL = int(os.environ.get('FLIGHT_SEARCH_CACHE_TTL', 5))
+flight_search_cache = SingleFlightCache(maxsize=FLIGHT_SEARCH_CACHE_SIZE, ttl=FLIGHT_SEARCH_CACHE_TTL)
+route_versions = {}
+
+# Connecting-flight search over an in-memory graph of upcoming flights, reloaded
+# after ROUTE_GRAPH_TTL seconds to catch up with other workers' writes
+ROUTE_GRAPH_TTL = int(os.environ.get('ROUTE_GRAPH_TTL', 300))
+MAX_CONNECTIONS = 3
+MAX_ITINERARIES = 50
+route_graph = RouteGraph(ttl=ROUTE_GRAPH_TTL, max_expansions=int(os.environ.get('ROUTE_SEARCH_MAX_EXPANSIONS', 20000)))
+
+# Filter-box fields: stored with a normalized `<field>_lc` shadow for anchored,
+# indexed prefix filters, and completed from per-process sorted arrays
+FLIGHT_SEARCH_FIELDS = ('company',)
+PLANE_SEARCH_FIELDS = ('model', 'registration')
+CREW_SEARCH_FIELDS = ('name', 'mainRole')
+AUTOCOMPLETE_SOURCES = {
+    'company': flights_collection,
+    'model': planes_collection,
+    'registration': planes_collection,
+    'name': crews_collection,
+    'mainRole': crews_collection
+}
+PUBLIC_AUTOCOMPLETE_FIELDS = ('company',)
+AUTOCOMPLETE_TTL = int(os.environ.get('AUTOCOMPLETE_TTL', 300))
+MAX_COMPLETIONS = 50
+autocomplete_indexes = {field: PrefixIndex(ttl=AUTOCOMPLETE_TTL) for field in AUTOCOMPLETE_SOURCES}
+
+# Plane and crew occupancy for double-booking checks. A flight's plane/crew
+# string is checked when it names a registered plane (registration) or crew (name)
+SCHEDULE_RESOURCES = {'plane': (planes_collection, 'registration'), 'crew': (crews_collection, 'name')}
+# Flights also keep `plane_lc`/`crew_lc` shadows for the indexed overlap query, which
+# looks back MAX_FLIGHT_HOURS (the longest accepted duration) before a window
+FLIGHT_SHADOW_FIELDS = FLIGHT_SEARCH_FIELDS + tuple(SCHEDULE_RESOURCES)
+MAX_FLIGHT_HOURS = 24
+SCHEDULE_INDEX_TTL = int(os.environ.get('SCHEDULE_INDEX_TTL', 300))
+schedule_index = ScheduleIndex(fields=tuple(SCHEDULE_RESOURCES), ttl=SCHEDULE_INDEX_TTL)
+
+# Seat counts pushed over server-sent events. A stream holds a thread of a
+# gthread worker but only a greenlet of a gevent/eventlet one, so the per-worker
+# cap follows WEB_WORKER_CLASS; streams close after SEAT_STREAM_MAX_AGE seconds
+# (EventSource reconnects on its own). Each worker polls the watched flights
+# every SEAT_STREAM_POLL_INTERVAL seconds, so writes from any process are seen
+SEAT_STREAM_MAX_FLIGHTS = 50
+WEB_WORKER_CLASS = os.environ.get('WEB_WORKER_CLASS', 'gthread')
+SEAT_STREAM_LIMIT = int(os.environ.get(
+    'SEAT_STREAM_LIMIT', 1000 if WEB_WORKER_CLASS in ('gevent', 'eventlet') else 2))
+SEAT_STREAM_MAX_AGE = int(os.environ.get('SEAT_STREAM_MAX_AGE', 300))
+SEAT_STREAM_HEARTBEAT = 15
+SEAT_STREAM_POLL_INTERVAL = float(os.environ.get('SEAT_STREAM_POLL_INTERVAL', 1.0))
+seat_updates = PubSub(coalesce=float(os.environ.get('SEAT_STREAM_COALESCE_MS', 250)) / 1000)
+
 def generate_token(user_id, role, username, firstName=None, lastName=None, email=None):
     payload = {
         'user_id': user_id,
@@ -37,17 +298,557 @@ def generate_token(user_id, role, username, firstName=None, lastName=None, email
     }
     return jwt.encode(payload, SECRET_KEY, algorithm='HS256')
 
+def parse_schedule(value):
+    """Parse an ISO 8601 schedule into a naive UTC datetime (BSON date)."""
+    if isinstance(value, datetime.datetime):
+        return value
+    schedule = datetime.datetime.fromisoformat(str(value).strip())
+    if schedule.tzinfo is not None:
+        schedule = schedule.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return schedule
+
+def parse_number(value, field, integer=False):
+    """Parse a non-negative number sent as JSON number or text, or raise ValueError."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        number = None
+    if isinstance(value, bool) or number is None or not math.isfinite(number) or number < 0 \
+            or (integer and not number.is_integer()):
+        raise ValueError(f'Valeur numérique invalide pour {field}')
+    return int(number) if integer else number
+
+def build_flight(data, default_date=None):
+    """Validate a flight payload and build the stored document.
+
+    Raises ValueError with the message to return to the client.
+    """
+    required_fields = ['number', 'departure', 'arrival', 'plane', 'crew', 'schedule', 'price', 'status']
+    if not all(data.get(field) for field in required_fields):
+        raise ValueError('Tous les champs requis ne sont pas fournis')
+
+    try:
+        schedule = parse_schedule(data['schedule'])
+    except ValueError:
+        raise ValueError('Horaire invalide, format ISO 8601 attendu (AAAA-MM-JJTHH:MM)')
+
+    try:
+        price_numeric = float(str(data['price']).split()[0])  # Extract numeric part (e.g., "150 €" -> 150)
+    except (ValueError, IndexError):
+        price_numeric = 0
+
+    passengers = parse_number(data.get('passengers', 0), 'passengers', integer=True)
+    capacity = parse_number(data.get('capacity', 0), 'capacity', integer=True)
+    duration = parse_number(data.get('duration', 0), 'duration')  # Hours, e.g. 2.5
+    if duration > MAX_FLIGHT_HOURS:
+        raise ValueError(f'Durée maximale: {MAX_FLIGHT_HOURS} h')
+
+    return {
+        'number': data['number'],
+        'departure': data['departure'],
+        'arrival': data['arrival'],
+        'plane': data['plane'],
+        'crew': data['crew'],
+        'schedule': schedule,
+        'price': data['price'],
+        'price_numeric': price_numeric,
+        'promotion': data.get('promotion', ''),
+        'status': data['status'],
+        'date': data.get('date', default_date),
+        'passengers': passengers,
+        'capacity': capacity,
+        'class': data.get('class', 'economique'),
+        'company': data.get('company', 'Tunisair'),
+        'duration': duration,
+        'escales': data.get('escales', '0')
+    }
+
+def search_keys(document, fields):
+    """Normalized shadow values stored next to the filterable fields."""
+    return {f'{field}_lc': normalize_key(document[field]) for field in fields if document.get(field)}
+
+def with_search_keys(document, fields):
+    """Copy of `document` to store, with its shadow values; responses keep the original."""
+    return dict(document, **search_keys(document, fields))
+
+def backfill_search_keys():
+    """Fill the shadow values of documents written before the prefix filters existed."""
+    updated = {}
+    for collection, fields in ((flights_collection, FLIGHT_SHADOW_FIELDS),
+                               (planes_collection, PLANE_SEARCH_FIELDS),
+                               (crews_collection, CREW_SEARCH_FIELDS)):
+        operations = []
+        updated[collection.name] = 0
+        for document in collection.find({}, {field: 1 for field in fields}):
+            keys = search_keys(document, fields)
+            if keys:
+                operations.append(UpdateOne({'_id': document['_id']}, {'$set': keys}))
+            if len(operations) == 1000:
+                updated[collection.name] += collection.bulk_write(operations, ordered=False).modified_count
+                operations = []
+        if operations:
+            updated[collection.name] += collection.bulk_write(operations, ordered=False).modified_count
+    return updated
+
+def require_search_keys():
+    # Before the first *_lc lookup after an upgrade
+    ensure_built('search_keys', backfill_search_keys)
+
+def prefix_filter(value):
+    # Anchored and case-sensitive on the normalized shadow field, so MongoDB scans an index range
+    return {'$regex': '^' + re.escape(normalize_key(value))}
+
+def update_autocomplete(fields, before, after):
+    for field in fields:
+        autocomplete_indexes[field].update(removed=(before or {}).get(field), added=(after or {}).get(field))
+
+def ensure_indexes():
+    """Create the indexes backing the common search filters (idempotent)."""
+    flights_collection.create_indexes([
+        # The trailing _id lets keyset-paginated searches walk the index in sort order
+        IndexModel([('departure', ASCENDING), ('arrival', ASCENDING), ('schedule', ASCENDING), ('_id', ASCENDING)],
+                   name='departure_arrival_schedule_id'),
+        IndexModel([('departure', ASCENDING), ('arrival', ASCENDING), ('price_numeric', ASCENDING), ('_id', ASCENDING)],
+                   name='departure_arrival_price_id'),
+        IndexModel([('departure', ASCENDING), ('arrival', ASCENDING), ('duration', ASCENDING), ('_id', ASCENDING)],
+                   name='departure_arrival_duration_id'),
+        IndexModel([('class', ASCENDING), ('company', ASCENDING)], name='class_company'),
+        IndexModel([('date', ASCENDING)], name='date'),  # Report periods
+        IndexModel([('number', ASCENDING)], name='number'),  # Upserts from schedule imports
+        IndexModel([('company_lc', ASCENDING)], name='company_lc'),
+        IndexModel([('plane_lc', ASCENDING), ('schedule', ASCENDING)], name='plane_lc_schedule'),  # Double bookings
+        IndexModel([('crew_lc', ASCENDING), ('schedule', ASCENDING)], name='crew_lc_schedule'),
+    ])
+    planes_collection.create_indexes([
+        IndexModel([('model_lc', ASCENDING)], name='model_lc'),
+        IndexModel([('registration_lc', ASCENDING)], name='registration_lc'),
+    ])
+    crews_collection.create_indexes([
+        IndexModel([('name_lc', ASCENDING)], name='name_lc'),
+        IndexModel([('mainRole_lc', ASCENDING)], name='mainRole_lc'),
+    ])
+    flight_stats_collection.create_index([('day', ASCENDING), ('destination', ASCENDING)],
+                                         name='day_destination', unique=True)
+    cities_collection.create_index([('kind', ASCENDING), ('name', ASCENDING)], name='kind_name', unique=True)
+    promotions_collection.create_index([('destination', ASCENDING)], name='destination')
+    reservations_collection.create_indexes([
+        IndexModel([('user_id', ASCENDING), ('flight_id', ASCENDING)], name='user_flight'),
+        # Newest-first history pages, with _id breaking created_at ties for keyset pagination
+        IndexModel([('user_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)], name='user_created_id'),
+        # Admin search: one equality prefix per filter, then the newest-first sort
+        IndexModel([('flight_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)], name='flight_created_id'),
+        IndexModel([('status', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)], name='status_created_id'),
+        IndexModel([('passengers_details.passport_number', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)],
+                   name='passport_created_id'),
+        IndexModel([('created_at', DESCENDING), ('_id', DESCENDING)], name='created_id'),
+    ])
+
+def encode_cursor(sort_value, last_id):
+    """Encode the keyset position of the last returned row as an opaque token."""
+    raw = json_util.dumps({'v': sort_value, 'id': last_id})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(token):
+    """Return (sort_value, last_id) from a token built by encode_cursor, or raise ValueError."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        position = json_util.loads(raw)
+        return position['v'], ObjectId(position['id'])
+    except Exception as e:
+        raise ValueError('Curseur invalide') from e
+
+def parse_page_size(value):
+    """Parse the `limit` query parameter, capped at MAX_PAGE_SIZE."""
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        raise ValueError('limit doit être un entier positif')
+    return min(limit, MAX_PAGE_SIZE)
+
+def keyset_page(collection, query, sort_field, limit, cursor=None, projection=None, direction=ASCENDING):
+    """One page of `collection` in (sort_field, _id) order, resuming after `cursor`.
+
+    The cursor holds the stored sort value, not the projected one: a projection
+    may default a missing field ($ifNull) that the range filter still sees as
+    null. Null and missing values sort first in ascending order, last in
+    descending order. Returns (documents, next_cursor), next_cursor being None
+    on the last page. Raises ValueError for a malformed cursor.
+    """
+    if cursor:
+        last_value, last_id = decode_cursor(cursor)
+        after = '$gt' if direction == ASCENDING else '$lt'
+        ties = {sort_field: last_value, '_id': {after: last_id}}
+        if last_value is None:
+            # Past the nulls ascending; nothing but nulls is left descending
+            rest = [{sort_field: {'$ne': None}}] if direction == ASCENDING else []
+        else:
+            rest = [{sort_field: {after: last_value}}]
+            if direction != ASCENDING:
+                rest.append({sort_field: None})
+        query = dict(query, **{'$or': [ties] + rest})
+    stored_key = None
+    if projection and projection.get(sort_field) not in (1, True):
+        stored_key = '_keyset_value'
+        projection = dict(projection, **{stored_key: f'${sort_field}'})
+    documents = list(collection.find(query, projection)
+                     .sort([(sort_field, direction), ('_id', direction)]).limit(limit + 1))
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = encode_cursor(documents[-1].get(stored_key or sort_field), ObjectId(documents[-1]['_id']))
+    if stored_key:
+        for document in documents:
+            document.pop(stored_key, None)
+    return documents, next_cursor
+
+def reserve_seats(flight_id, seats):
+    """Atomically add `seats` passengers to a flight (negative to release them).
+
+    Growth is only applied while passengers + seats <= capacity, so concurrent
+    bookings cannot oversell. Returns the updated flight, or None if the flight
+    does not exist or does not have enough free seats.
+    """
+    query = {'_id': ObjectId(flight_id)}
+    if seats > 0:
+        query['$expr'] = {'$lte': [{'$add': ['$passengers', seats]}, '$capacity']}
+    flight = flights_collection.find_one_and_update(
+        query,
+        {'$inc': {'passengers': seats}},
+        return_document=ReturnDocument.AFTER
+    )
+    if flight and seats:
+        on_flights_changed([(dict(flight, passengers=flight['passengers'] - seats), flight)])
+    return flight
+
+def flight_stats_key(flight):
+    # Rollups follow the report periods, which are based on the flight `date`
+    return str(flight.get('date') or '')[:10], flight.get('arrival')
+
+def update_flight_stats(changes):
+    """Apply (before, after) flight changes to the daily rollup in one bulk write."""
+    deltas = {}
+    for before, after in changes:
+        for flight, sign in ((before, -1), (after, 1)):
+            if not flight:
+                continue
+            passengers = flight.get('passengers') or 0
+            delta = deltas.setdefault(flight_stats_key(flight), {'flights': 0, 'passengers': 0, 'capacity': 0, 'revenues': 0})
+            delta['flights'] += sign
+            delta['passengers'] += sign * passengers
+            delta['capacity'] += sign * (flight.get('capacity') or 0)
+            delta['revenues'] += sign * passengers * (flight.get('price_numeric') or 0)
+
+    operations = [
+        UpdateOne({'day': day, 'destination': destination}, {'$inc': delta}, upsert=True)
+        for (day, destination), delta in deltas.items() if any(delta.values())
+    ]
+    if operations:
+        flight_stats_collection.bulk_write(operations, ordered=False)
+
+def rebuild_flight_stats():
+    """Recompute flight_stats_daily from scratch (replaces the collection atomically)."""
+    flights_collection.aggregate([
+        {"$group": {
+            "_id": {"day": {"$substrCP": [{"$ifNull": ["$date", ""]}, 0, 10]}, "destination": "$arrival"},
+            "flights": {"$sum": 1},
+            "passengers": {"$sum": "$passengers"},
+            "capacity": {"$sum": "$capacity"},
+            "revenues": {"$sum": {"$multiply": ["$price_numeric", "$passengers"]}}
+        }},
+        {"$project": {
+            "_id": 0,
+            "day": "$_id.day",
+            "destination": "$_id.destination",
+            "flights": 1,
+            "passengers": 1,
+            "capacity": 1,
+            "revenues": 1
+        }},
+        {"$out": flight_stats_collection.name}
+    ])
+
+built_data = set()
+built_data_lock = threading.Lock()
+
+def ensure_built(name, build):
+    """Run the one-off `build` of derived data unless app_state records it for this database.
+
+    Incremental updates start with the first write after an upgrade, so an
+    empty or non-empty collection says nothing about whether it was built.
+    """
+    if name in built_data:
+        return
+    with built_data_lock:
+        if name in built_data:
+            return
+        if app_state_collection.find_one({'_id': name}, {'_id': 1}) is None:
+            build()
+            mark_built(name)
+        built_data.add(name)
+
+def mark_built(name):
+    app_state_collection.update_one({'_id': name}, {'$set': {'built_at': datetime.datetime.utcnow()}}, upsert=True)
+
+def update_city_catalog(changes):
+    """Maintain the per-city flight reference counts behind /api/cities."""
+    deltas = {}
+    for before, after in changes:
+        for flight, sign in ((before, -1), (after, 1)):
+            if not flight:
+                continue
+            for kind in ('departure', 'arrival'):
+                if flight.get(kind):
+                    key = (kind, flight[kind])
+                    deltas[key] = deltas.get(key, 0) + sign
+
+    operations = [
+        UpdateOne({'kind': kind, 'name': name}, {'$inc': {'flights': delta}}, upsert=True)
+        for (kind, name), delta in deltas.items() if delta
+    ]
+    if operations:
+        cities_collection.bulk_write(operations, ordered=False)
+        city_cache.clear()
+
+def rebuild_city_catalog():
+    """Recompute the city catalog from the flights (replaces the collection atomically)."""
+    flights_collection.aggregate([
+        {"$project": {"cities": [
+            {"kind": "departure", "name": "$departure"},
+            {"kind": "arrival", "name": "$arrival"}
+        ]}},
+        {"$unwind": "$cities"},
+        {"$match": {"cities.name": {"$nin": [None, ""]}}},
+        {"$group": {"_id": "$cities", "flights": {"$sum": 1}}},
+        {"$project": {"_id": 0, "kind": "$_id.kind", "name": "$_id.name", "flights": 1}},
+        {"$out": cities_collection.name}
+    ])
+    city_cache.clear()
+
+def flight_matches_search(criteria, flight):
+    """Whether `flight` passes the get_flights filters normalized in `criteria`."""
+    for field in ('departure', 'arrival', 'class', 'escales'):
+        if field in criteria and str(flight.get(field)) != criteria[field]:
+            return False
+    if 'flight_id' in criteria and str(flight.get('_id')) != criteria['flight_id']:
+        return False
+    if 'company' in criteria:
+        company = flight.get('company_lc') or normalize_key(flight.get('company') or '')
+        if not company.startswith(criteria['company']):
+            return False
+    if 'day' in criteria:
+        schedule = flight.get('schedule')
+        if isinstance(schedule, datetime.datetime) and not criteria['day'] <= schedule < criteria['day'] + datetime.timedelta(days=1):
+            return False
+    for field, bound in (('price_numeric', criteria.get('price')), ('duration', criteria.get('duration'))):
+        try:
+            if bound is not None and float(flight.get(field) or 0) > bound:
+                return False
+        except (TypeError, ValueError):
+            pass  # Unsure: treat as a match, an extra invalidation is harmless
+    return True
+
+def flight_search_tag(criteria):
+    return criteria.get('departure'), criteria.get('arrival')
+
+def invalidate_flight_searches(changes):
+    flights = [flight for before, after in changes for flight in (before, after) if flight]
+    # Searches filtered on the flight's route or on either end of it, or on neither
+    tags = set()
+    for flight in flights:
+        departure, arrival = str(flight.get('departure')), str(flight.get('arrival'))
+        tags.update(((departure, arrival), (departure, None), (None, arrival), (None, None)))
+
+    def affected(key):
+        criteria = dict(key[0])
+        return any(flight_matches_search(criteria, flight) for flight in flights)
+
+    flight_search_cache.invalidate(affected, tags)
+
+def bump_route_versions(changes):
+    routes = {(flight.get('departure'), flight.get('arrival'))
+              for before, after in changes for flight in (before, after) if flight}
+    for route in routes:
+        route_versions[route] = route_versions.get(route, 0) + 1
+
+def seat_state(flight_id, flight):
+    """Public seat counts of a flight document; a deleted flight is reported as such."""
+    if flight is None:
+        return {'_id': flight_id, 'deleted': True}
+    capacity = flight.get('capacity') or 0
+    passengers = flight.get('passengers') or 0
+    return {'_id': flight_id, 'capacity': capacity, 'passengers': passengers,
+            'seats_left': max(capacity - passengers, 0)}
+
+def fetch_seat_states(flight_ids):
+    """Current seat counts of the given flights, one query for all of them."""
+    flights = flights_collection.find({'_id': {'$in': [ObjectId(flight_id) for flight_id in flight_ids]}},
+                                      {'capacity': 1, 'passengers': 1})
+    found = {str(flight['_id']): flight for flight in flights}
+    return {flight_id: seat_state(flight_id, found.get(flight_id)) for flight_id in flight_ids}
+
+seat_feed = PollingFeed(seat_updates, fetch_seat_states, interval=SEAT_STREAM_POLL_INTERVAL)
+
+def publish_seat_updates(changes):
+    # Writes of this worker reach its watchers at once; the poll covers the others
+    for before, after in changes:
+        flight = after or before
+        if flight and '_id' in flight:
+            flight_id = str(flight['_id'])
+            seat_feed.observe(flight_id, seat_state(flight_id, after))
+
+def on_flights_changed(changes):
+    """Propagate flight writes, given as (before, after) pairs, to the derived data.
+
+    `before` is None for an insert and `after` is None for a delete.
+    """
+    update_flight_stats(changes)
+    update_city_catalog(changes)
+    route_graph.apply(changes)
+    schedule_index.apply(changes)
+    bump_route_versions(changes)
+    invalidate_flight_searches(changes)
+    publish_seat_updates(changes)
+    for before, after in changes:
+        update_autocomplete(FLIGHT_SEARCH_FIELDS, before, after)
+
+def load_promotions():
+    """Return the cached promotion index, reloading it after a change or the TTL."""
+    promotions = promotion_cache.get('promotions')
+    if promotions is None:
+        by_destination = {}
+        promotions_response = list(promotions_collection.find({}, PROMOTION_PROJECTION))
+        for promo in promotions_response:
+            by_destination.setdefault(promo['destination'], promo)  # Same pick as find_one
+        promotions = {
+            'by_destination': by_destination,
+            'response': serialize_with_etag({'success': True, 'promotions': promotions_response})
+        }
+        promotion_cache.set('promotions', promotions)
+    return promotions
+
+def find_promotion(destination):
+    return load_promotions()['by_destination'].get(destination)
+
+def compute_total_price(flight, passengers):
+    total_price = passengers * flight['price_numeric']
+    if flight.get('promotion'):
+        promo = find_promotion(flight['arrival'])
+        if promo:
+            total_price = passengers * promo['newPrice']
+    return total_price
+
+def seats_unavailable_response(flight_id):
+    # Only reached when reserve_seats failed: tell a missing flight from a full one
+    if flights_collection.count_documents({'_id': ObjectId(flight_id)}, limit=1) == 0:
+        return jsonify({'success': False, 'message': 'Vol non trouvé'}), 404
+    return jsonify({'success': False, 'message': 'Pas assez de sièges disponibles'}), 400
+
+def serialize_with_etag(body):
+    """Serialize a JSON body once and derive its ETag, for caching."""
+    payload = app.json.dumps(body).encode()
+    return payload, hashlib.sha1(payload).hexdigest()
+
+def conditional_json(payload, etag):
+    """Serve pre-serialized JSON, answering 304 when the client copy is current."""
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(payload, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'  # Always revalidate, the 304 is cheap
+    return response
+
 def verify_token(token):
+    if token.startswith('Bearer '):
+        token = token[7:]
+    cache_key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(cache_key)
+    if payload is not None:
+        return dict(payload)  # Handlers may modify it; the cached one stays intact
+
     try:
-        if token.startswith('Bearer '):
-            token = token[7:]
         payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-        return payload
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
 
+    # Never serve a cached payload past the token's own expiry
+    ttl = min(TOKEN_CACHE_TTL, payload.get('exp', 0) - time.time())
+    if ttl > 0:
+        token_cache.set(cache_key, dict(payload), ttl=ttl)
+    return payload
+
+def get_hash_pool():
+    # Created lazily in each process: a pool inherited through fork is unusable
+    global hash_pool, hash_pool_pid
+    with hash_pool_lock:
+        if hash_pool is None or hash_pool_pid != os.getpid():
+            hash_pool = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS,
+                                            mp_context=multiprocessing.get_context('spawn'))
+            hash_pool_pid = os.getpid()
+        return hash_pool
+
+def run_password_task(fn, *args):
+    """Run a password KDF call in the hashing pool.
+
+    At most PASSWORD_HASH_QUEUE calls are pending per process; raises
+    TimeoutError when the pool is saturated for PASSWORD_HASH_TIMEOUT seconds.
+    """
+    if PASSWORD_HASH_WORKERS == 0:
+        return fn(*args)
+    if not hash_slots.acquire(timeout=PASSWORD_HASH_TIMEOUT):
+        raise TimeoutError('Password hashing pool saturated')
+    try:
+        return get_hash_pool().submit(fn, *args).result(timeout=PASSWORD_HASH_TIMEOUT)
+    finally:
+        hash_slots.release()
+
+@functools.lru_cache(maxsize=None)
+def password_hash_prefix():
+    # werkzeug normalizes the method (e.g. 'scrypt' -> 'scrypt:32768:8:1') into the hash prefix
+    return generate_password_hash('', PASSWORD_HASH_METHOD).split('$', 1)[0]
+
+def needs_rehash(password_hash):
+    return password_hash.split('$', 1)[0] != password_hash_prefix()
+
+def get_user_profile(user_id):
+    """Return the public profile of a user, or None if it does not exist."""
+    profile = user_cache.get(user_id)
+    if profile is None:
+        user = users_collection.find_one({'_id': ObjectId(user_id)}, {'password': 0})
+        if not user:
+            return None
+        profile = {
+            '_id': str(user['_id']),
+            'firstName': user.get('firstName'),
+            'lastName': user.get('lastName'),
+            'username': user['username'],
+            'email': user.get('email'),
+            'role': user['role']
+        }
+        user_cache.set(user_id, profile)
+    return dict(profile)  # Handlers may modify it; the cached one stays intact
+
+def current_user_profile(payload):
+    """Profile of the token's user; the built-in admin lives in the token only."""
+    if payload['user_id'] == 'admin' and payload['username'] == 'admin':
+        return {
+            '_id': 'admin',
+            'username': 'admin',
+            'role': 'admin',
+            'firstName': payload.get('firstName', 'Admin'),
+            'lastName': payload.get('lastName', 'User'),
+            'email': payload.get('email', 'admin@tunisair.com')
+        }
+    return get_user_profile(payload['user_id'])
+
+def invalidate_user(user_id):
+    # Call after any write to a user document (profile, role, password or deletion)
+    user_cache.pop(str(user_id))
+
 @app.route(f'{API_PREFIX}/register', methods=['POST'])
 def register():
     try:
@@ -74,7 +875,10 @@ def register():
             else:
                 return jsonify({'success': False, 'message': 'Email déjà utilisé'}), 409
 
-        hashed_password = generate_password_hash(password)
+        try:
+            hashed_password = run_password_task(generate_password_hash, password, PASSWORD_HASH_METHOD)
+        except TimeoutError:
+            return jsonify({'success': False, 'message': 'Service surchargé, veuillez réessayer'}), 503
         user = {
             'firstName': firstName,
             'lastName': lastName,
@@ -130,9 +934,22 @@ def login():
         }), 200
 
     user = users_collection.find_one({'username': username})
-    if not user or not check_password_hash(user['password'], password):
+    try:
+        valid = user is not None and run_password_task(check_password_hash, user['password'], password)
+    except TimeoutError:
+        return jsonify({'success': False, 'message': 'Service surchargé, veuillez réessayer'}), 503
+    if not valid:
         return jsonify({'success': False, 'message': 'Nom d\'utilisateur ou mot de passe incorrect'}), 401
 
+    # Upgrade hashes made with older parameters while we have the clear password
+    if needs_rehash(user['password']):
+        try:
+            new_hash = run_password_task(generate_password_hash, password, PASSWORD_HASH_METHOD)
+            users_collection.update_one({'_id': user['_id'], 'password': user['password']}, {'$set': {'password': new_hash}})
+            invalidate_user(user['_id'])
+        except TimeoutError:
+            pass  # Retried on the next login
+
     token = generate_token(str(user['_id']), user['role'], user['username'], user.get('firstName'), user.get('lastName'), user.get('email'))
     user_response = {
         '_id': str(user['_id']),
@@ -162,33 +979,10 @@ def validate_token():
     if not payload:
         return jsonify({'success': False, 'message': 'Token invalide ou expiré'}), 401
 
-    user_id = payload['user_id']
-    username = payload['username']
-    role = payload['role']
-
-    if user_id == 'admin' and username == 'admin':
-        user_response = {
-            '_id': 'admin',
-            'username': 'admin',
-            'role': 'admin',
-            'firstName': payload.get('firstName', 'Admin'),
-            'lastName': payload.get('lastName', 'User'),
-            'email': payload.get('email', 'admin@tunisair.com')
-        }
-        return jsonify({'success': True, 'user': user_response}), 200
-
-    user = users_collection.find_one({'_id': ObjectId(user_id)})
-    if not user:
+    user_response = current_user_profile(payload)
+    if not user_response:
         return jsonify({'success': False, 'message': 'Utilisateur non trouvé'}), 404
 
-    user_response = {
-        '_id': str(user['_id']),
-        'firstName': user.get('firstName'),
-        'lastName': user.get('lastName'),
-        'username': user['username'],
-        'email': user.get('email'),
-        'role': user['role']
-    }
     return jsonify({'success': True, 'user': user_response}), 200
 
 @app.route(f'{API_PREFIX}/flights', methods=['GET'])
@@ -203,47 +997,123 @@ def get_flights():
     duration = request.args.get('duration')
     escales = request.args.get('escales')
     flight_id = request.args.get('flight_id')
+    sort_field = request.args.get('sort')
+    limit = request.args.get('limit')
+    cursor_token = request.args.get('cursor')
 
+    criteria = {}  # Normalized filters: the cache key and what writes are matched against
     if departure:
-        query['departure'] = departure
+        query['departure'] = criteria['departure'] = departure
     if arrival:
-        query['arrival'] = arrival
+        query['arrival'] = criteria['arrival'] = arrival
     if date:
-        query['schedule'] = {'$regex': f'^{date}', '$options': 'i'}  # Match date part of ISO string
-    if price:
-        query['price_numeric'] = {'$lte': float(price)}
+        try:
+            day = criteria['day'] = datetime.datetime.strptime(date, '%Y-%m-%d')
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Date invalide, format AAAA-MM-JJ attendu'}), 400
+        query['schedule'] = {'$gte': day, '$lt': day + datetime.timedelta(days=1)}  # Half-open day range
+    try:
+        if price:
+            criteria['price'] = float(price)
+            query['price_numeric'] = {'$lte': criteria['price']}
+        if duration:
+            criteria['duration'] = float(duration)
+            query['duration'] = {'$lte': criteria['duration']}
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Paramètres invalides'}), 400
     if flight_class:
-        query['class'] = flight_class
+        query['class'] = criteria['class'] = flight_class
     if company:
-        query['company'] = {'$regex': company, '$options': 'i'}
-    if duration:
-        query['duration'] = {'$lte': float(duration)}
+        require_search_keys()
+        criteria['company'] = normalize_key(company)
+        query['company_lc'] = prefix_filter(company)
     if escales:
-        query['escales'] = escales
+        query['escales'] = criteria['escales'] = escales
     if flight_id:
+        if not ObjectId.is_valid(flight_id):
+            return jsonify({'success': False, 'message': 'ID de vol invalide'}), 400
+        criteria['flight_id'] = flight_id
         query['_id'] = ObjectId(flight_id)
 
-    flights = list(flights_collection.find(query))
-    flights_response = [{
-        '_id': str(flight['_id']),
-        'number': flight['number'],
-        'departure': flight['departure'],
-        'arrival': flight['arrival'],
-        'plane': flight.get('plane', ''),
-        'crew': flight.get('crew', ''),
-        'schedule': flight['schedule'],
-        'price': flight['price'],
-        'price_numeric': flight.get('price_numeric', 0),
-        'promotion': flight.get('promotion', ''),
-        'status': flight['status'],
-        'class': flight.get('class', 'economique'),
-        'company': flight.get('company', 'Tunisair'),
-        'duration': flight.get('duration', 0),
-        'escales': flight.get('escales', '0'),
-        'passengers': flight.get('passengers', 0),
-        'capacity': flight.get('capacity', 0)
-    } for flight in flights]
-    return jsonify({'success': True, 'flights': flights_response}), 200
+    if sort_field and sort_field not in FLIGHT_SORT_FIELDS:
+        return jsonify({'success': False, 'message': f"Tri invalide, valeurs possibles: {', '.join(FLIGHT_SORT_FIELDS)}"}), 400
+
+    # Keyset pagination: each page resumes after the (sort value, _id) of the previous one
+    paginate = bool(limit or cursor_token)
+    if paginate:
+        sort_field = sort_field or 'schedule'
+        try:
+            limit = parse_page_size(limit) if limit else DEFAULT_PAGE_SIZE
+            if cursor_token:
+                decode_cursor(cursor_token)  # Reject a bad cursor before it reaches the cache
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+    def search():
+        if paginate:
+            flights, next_cursor = keyset_page(flights_collection, query, sort_field, limit,
+                                               cursor_token, FLIGHT_PROJECTION)
+            return serialize_with_etag({'success': True, 'flights': flights, 'next_cursor': next_cursor})
+        flights = flights_collection.find(query, FLIGHT_PROJECTION)
+        if sort_field:
+            flights = flights.sort([(sort_field, ASCENDING), ('_id', ASCENDING)])
+        return serialize_with_etag({'success': True, 'flights': list(flights)})
+
+    # Identical concurrent misses wait for one query instead of each running it
+    cache_key = (tuple(sorted(criteria.items())), sort_field, paginate and limit, cursor_token)
+    return conditional_json(*flight_search_cache.get_or_compute(cache_key, search, flight_search_tag(criteria)))
+
+def load_schedule_index():
+    since = datetime.datetime.utcnow() - datetime.timedelta(days=2)
+    return flights_collection.find({'schedule': {'$gte': since}},
+                                   {'number': 1, 'plane': 1, 'crew': 1, 'schedule': 1, 'duration': 1})
+
+def schedule_resource_keys(flight):
+    """(field, normalized key) of the plane and crew of `flight` that name a single resource."""
+    keys = []
+    for field, (collection, key_field) in SCHEDULE_RESOURCES.items():
+        if not flight.get(field):
+            continue
+        key = normalize_key(flight[field])
+        # A model name ('Airbus A320') does not identify one aircraft
+        if collection.find_one({f'{key_field}_lc': key}, {'_id': 1}):
+            keys.append((field, key))
+    return keys
+
+def find_schedule_conflicts(flight, exclude=None):
+    """Flights already holding this flight's plane or crew at an overlapping time.
+
+    Read from MongoDB on the plane_lc/crew_lc + schedule indexes: the per-process
+    ScheduleIndex lags behind other workers' writes, so it only serves the
+    /availability listing and never decides whether a write goes through.
+    """
+    interval = flight_interval(flight)
+    if interval is None:
+        return []
+    require_search_keys()
+    start, end = interval
+    conflicts = []
+    for field, key in schedule_resource_keys(flight):
+        query = {f'{field}_lc': key,
+                 'schedule': {'$gt': start - datetime.timedelta(hours=MAX_FLIGHT_HOURS), '$lt': end}}
+        if exclude:
+            query['_id'] = {'$ne': ObjectId(exclude)}
+        others = flights_collection.find(query, {'number': 1, field: 1, 'schedule': 1, 'duration': 1})
+        for other in others.sort('schedule', ASCENDING):
+            other_interval = flight_interval(other)
+            if other_interval and other_interval[1] > start:
+                conflicts.append({
+                    '_id': str(other['_id']),
+                    'number': other.get('number'),
+                    'field': field,
+                    'resource': other[field],
+                    'start': other_interval[0],
+                    'end': other_interval[1]
+                })
+    return conflicts
+
+def schedule_conflict_response(conflicts):
+    return jsonify({'success': False, 'message': 'Avion ou équipage déjà affecté sur ce créneau', 'conflicts': conflicts}), 409
 
 @app.route(f'{API_PREFIX}/flights', methods=['POST'])
 def add_flight():
@@ -255,38 +1125,28 @@ def add_flight():
     if not payload or payload['role'] != 'admin':
         return jsonify({'success': False, 'message': 'Accès non autorisé'}), 403
 
-    data = request.json
-    required_fields = ['number', 'departure', 'arrival', 'plane', 'crew', 'schedule', 'price', 'status']
-    if not all(data.get(field) for field in required_fields):
-        return jsonify({'success': False, 'message': 'Tous les champs requis ne sont pas fournis'}), 400
-
     try:
-        price_numeric = float(data['price'].split()[0])  # Extract numeric part (e.g., "150 €" -> 150)
-    except (ValueError, IndexError):
-        price_numeric = 0
-
-    flight = {
-        'number': data['number'],
-        'departure': data['departure'],
-        'arrival': data['arrival'],
-        'plane': data['plane'],
-        'crew': data['crew'],
-        'schedule': data['schedule'],
-        'price': data['price'],
-        'price_numeric': price_numeric,
-        'promotion': data.get('promotion', ''),
-        'status': data['status'],
-        'date': data.get('date', datetime.datetime.utcnow().isoformat()),
-        'passengers': data.get('passengers', 0),
-        'capacity': data.get('capacity', 0),
-        'class': data.get('class', 'economique'),
-        'company': data.get('company', 'Tunisair'),
-        'duration': data.get('duration', 0),
-        'escales': data.get('escales', '0')
-    }
-    result = flights_collection.insert_one(flight)
+        flight = build_flight(request.json, default_date=datetime.datetime.utcnow().isoformat())
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    allow_conflicts = request.args.get('allow_conflicts') == 'true'
+    conflicts = find_schedule_conflicts(flight)
+    if conflicts and not allow_conflicts:
+        return schedule_conflict_response(conflicts)
+
+    stored = with_search_keys(flight, FLIGHT_SHADOW_FIELDS)
+    result = flights_collection.insert_one(stored)
+    if not allow_conflicts:
+        # Check again now that the flight is visible: a concurrent write of the same
+        # plane or crew was either seen before (409 above) or sees this one; both back out
+        conflicts = find_schedule_conflicts(stored, exclude=str(result.inserted_id))
+        if conflicts:
+            flights_collection.delete_one({'_id': result.inserted_id})
+            return schedule_conflict_response(conflicts)
+    on_flights_changed([(None, stored)])
     flight['_id'] = str(result.inserted_id)
-    return jsonify({'success': True, 'flight': flight, 'message': 'Vol ajouté avec succès'}), 201
+    return jsonify({'success': True, 'flight': flight, 'conflicts': conflicts, 'message': 'Vol ajouté avec succès'}), 201
 
 @app.route(f'{API_PREFIX}/flights/<id>', methods=['PUT'])
 def update_flight(id):
@@ -298,41 +1158,33 @@ def update_flight(id):
     if not payload or payload['role'] != 'admin':
         return jsonify({'success': False, 'message': 'Accès non autorisé'}), 403
 
-    data = request.json
-    required_fields = ['number', 'departure', 'arrival', 'plane', 'crew', 'schedule', 'price', 'status']
-    if not all(data.get(field) for field in required_fields):
-        return jsonify({'success': False, 'message': 'Tous les champs requis ne sont pas fournis'}), 400
-
     try:
-        price_numeric = float(data['price'].split()[0])  # Extract numeric part
-    except (ValueError, IndexError):
-        price_numeric = 0
-
-    flight = {
-        'number': data['number'],
-        'departure': data['departure'],
-        'arrival': data['arrival'],
-        'plane': data['plane'],
-        'crew': data['crew'],
-        'schedule': data['schedule'],
-        'price': data['price'],
-        'price_numeric': price_numeric,
-        'promotion': data.get('promotion', ''),
-        'status': data['status'],
-        'date': data.get('date'),
-        'passengers': data.get('passengers', 0),
-        'capacity': data.get('capacity', 0),
-        'class': data.get('class', 'economique'),
-        'company': data.get('company', 'Tunisair'),
-        'duration': data.get('duration', 0),
-        'escales': data.get('escales', '0')
-    }
-    result = flights_collection.update_one({'_id': ObjectId(id)}, {'$set': flight})
-    if result.matched_count == 0:
+        flight = build_flight(request.json)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    allow_conflicts = request.args.get('allow_conflicts') == 'true'
+    conflicts = find_schedule_conflicts(flight, exclude=id)
+    if conflicts and not allow_conflicts:
+        return schedule_conflict_response(conflicts)
+
+    stored = with_search_keys(flight, FLIGHT_SHADOW_FIELDS)
+    previous = flights_collection.find_one_and_update({'_id': ObjectId(id)}, {'$set': stored})
+    if not previous:
         return jsonify({'success': False, 'message': 'Vol non trouvé'}), 404
+    if not allow_conflicts:
+        conflicts = find_schedule_conflicts(stored, exclude=id)  # As in add_flight
+        if conflicts:
+            restore = {'$set': {field: previous[field] for field in stored if field in previous}}
+            missing = [field for field in stored if field not in previous]
+            if missing:
+                restore['$unset'] = {field: '' for field in missing}
+            flights_collection.update_one({'_id': previous['_id']}, restore)
+            return schedule_conflict_response(conflicts)
+    on_flights_changed([(previous, dict(previous, **stored))])
 
     flight['_id'] = id
-    return jsonify({'success': True, 'flight': flight, 'message': 'Vol modifié avec succès'}), 200
+    return jsonify({'success': True, 'flight': flight, 'conflicts': conflicts, 'message': 'Vol modifié avec succès'}), 200
 
 @app.route(f'{API_PREFIX}/flights/<id>', methods=['DELETE'])
 def delete_flight(id):
@@ -344,12 +1196,296 @@ def delete_flight(id):
     if not payload or payload['role'] != 'admin':
         return jsonify({'success': False, 'message': 'Accès non autorisé'}), 403
 
-    result = flights_collection.delete_one({'_id': ObjectId(id)})
-    if result.deleted_count == 0:
+    flight = flights_collection.find_one_and_delete({'_id': ObjectId(id)})
+    if not flight:
         return jsonify({'success': False, 'message': 'Vol non trouvé'}), 404
+    on_flights_changed([(flight, None)])
 
     return jsonify({'success': True, 'message': 'Vol supprimé avec succès'}), 200
 
+def read_flight_rows(stream, import_format):
+    """Yield (line number, flight payload or error message) for each record of an upload."""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if import_format == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            # Empty cells fall back to the same defaults as missing JSON fields
+            yield reader.line_num, {key: value.strip() for key, value in row.items()
+                                    if key and value and value.strip()}
+        return
+    for line, record in enumerate(text, 1):
+        if not record.strip():
+            continue
+        try:
+            data = app.json.loads(record)
+        except ValueError:
+            yield line, 'JSON invalide'
+            continue
+        yield line, data if isinstance(data, dict) else 'Objet JSON attendu'
+
+def reject_schedule_conflicts(batch, current, summary):
+    """Drop the rows whose plane or crew is already taken, recording them as row errors.
+
+    Rows are checked against MongoDB like add_flight, and against the earlier
+    rows of the batch, which are not written yet. In upsert mode `current` maps
+    the numbers being revised to the stored flight, which a row does not
+    conflict with; it is None in insert mode.
+    """
+    accepted = []
+    taken = {}  # (field, key) -> [(line, number, start, end)] for the rows kept so far
+    for line, flight in batch:
+        existing = current.get(flight['number']) if current is not None else None
+        revises = flight['number'] if current is not None else None
+        conflicts = find_schedule_conflicts(flight, exclude=existing and str(existing['_id']))
+        interval = flight_interval(flight)
+        keys = schedule_resource_keys(flight) if interval else []
+        for field, key in keys:
+            for other_line, number, start, end in taken.get((field, key), ()):
+                if start < interval[1] and interval[0] < end and number != revises:
+                    conflicts.append({'_id': None, 'line': other_line, 'number': number, 'field': field,
+                                      'resource': flight[field], 'start': start, 'end': end})
+        if conflicts:
+            summary['errors'].append({'line': line, 'message': 'Avion ou équipage déjà affecté sur ce créneau',
+                                      'conflicts': conflicts})
+            continue
+        accepted.append((line, flight))
+        if revises is not None:
+            # This row revises an earlier one with the same number, which frees its slot
+            for rows in taken.values():
+                rows[:] = [row for row in rows if row[1] != revises]
+        for field, key in keys:
+            taken.setdefault((field, key), []).append((line, flight['number'], *interval))
+    return accepted
+
+def write_flight_batch(batch, upsert, summary, allow_conflicts=False):
+    """Write (line, flight) pairs in one unordered bulk_write, recording per-row failures."""
+    current = None
+    if upsert:
+        current = {}
+        for existing in flights_collection.find({'number': {'$in': [flight['number'] for _, flight in batch]}}):
+            current.setdefault(existing['number'], existing)
+    if not allow_conflicts:
+        batch = reject_schedule_conflicts(batch, current, summary)
+        if not batch:
+            return
+    if upsert:
+        operations, befores, afters = [], [], []
+        for _, flight in batch:
+            # A revision must not reset the seats already sold
+            on_insert = {'passengers': flight.pop('passengers'), 'date': flight.pop('date')}
+            operations.append(UpdateOne({'number': flight['number']},
+                                        {'$set': flight, '$setOnInsert': on_insert}, upsert=True))
+            before = current.get(flight['number'])
+            befores.append(before)
+            afters.append(dict(before or on_insert, **flight))
+            current[flight['number']] = afters[-1]
+    else:
+        operations = [InsertOne(flight) for _, flight in batch]
+
+    try:
+        result = flights_collection.bulk_write(operations, ordered=False).bulk_api_result
+    except BulkWriteError as e:
+        result = e.details
+    failed = set()
+    for error in result.get('writeErrors', []):
+        failed.add(error['index'])
+        summary['errors'].append({'line': batch[error['index']][0], 'message': error['errmsg']})
+    summary['inserted'] += result['nInserted'] + result['nUpserted']
+    summary['updated'] += result['nMatched']
+
+    changes = []
+    upserted_ids = {item['index']: item['_id'] for item in result.get('upserted', [])}
+    for index, (_, flight) in enumerate(batch):
+        if index in failed:
+            continue
+        if not upsert:
+            changes.append((None, flight))
+            continue
+        before, after = befores[index], afters[index]
+        after['_id'] = upserted_ids.get(index, before and before.get('_id'))
+        changes.append((before, after))
+    on_flights_changed(changes)
+
+def build_fare_calendar(departure, arrival, start, days):
+    """Cheapest fare with free seats, and free seats, per day of [start, start + days)."""
+    free_seats = {'$subtract': [{'$ifNull': ['$capacity', 0]}, {'$ifNull': ['$passengers', 0]}]}
+    by_day = {row['_id']: row for row in flights_collection.aggregate([
+        {'$match': {
+            'departure': departure,
+            'arrival': arrival,
+            'schedule': {'$gte': start, '$lt': start + datetime.timedelta(days=days)}
+        }},
+        {'$group': {
+            '_id': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$schedule'}},
+            'min_price': {'$min': {'$cond': [{'$gt': [free_seats, 0]}, '$price_numeric', None]}},
+            'seats': {'$sum': {'$max': [free_seats, 0]}},
+            'flights': {'$sum': 1}
+        }}
+    ])}
+    calendar = []
+    for offset in range(days):
+        day = (start + datetime.timedelta(days=offset)).strftime('%Y-%m-%d')
+        row = by_day.get(day, {})
+        calendar.append({
+            'date': day,
+            'min_price': row.get('min_price'),
+            'seats': row.get('seats', 0),
+            'flights': row.get('flights', 0)
+        })
+    return calendar
+
+@app.route(f'{API_PREFIX}/flights/calendar', methods=['GET'])
+def get_fare_calendar():
+    departure = request.args.get('departure')
+    arrival = request.args.get('arrival')
+    date = request.args.get('date')
+    if not departure or not arrival or not date:
+        return jsonify({'success': False, 'message': 'Départ, arrivée et date sont requis'}), 400
+    try:
+        day = datetime.datetime.strptime(date, '%Y-%m-%d')
+        window = int(request.args.get('days', 3))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Paramètres invalides'}), 400
+    if not 0 <= window <= MAX_CALENDAR_DAYS:
+        return jsonify({'success': False, 'message': f'Fenêtre entre 0 et {MAX_CALENDAR_DAYS} jours'}), 400
+
+    start = day - datetime.timedelta(days=window)
+    cache_key = (departure, arrival, start, window, route_versions.get((departure, arrival), 0))
+    cached = calendar_cache.get(cache_key)
+    if cached is None:
+        calendar = build_fare_calendar(departure, arrival, start, 2 * window + 1)
+        cached = serialize_with_etag({'success': True, 'calendar': calendar})
+        calendar_cache.set(cache_key, cached)
+    return conditional_json(*cached)
+
+def sse_event(event, data):
+    return f'event: {event}\ndata: {app.json.dumps(data)}\n\n'
+
+@app.route(f'{API_PREFIX}/flights/stream', methods=['GET'])
+def stream_seat_updates():
+    ids = [flight_id for flight_id in request.args.get('ids', '').split(',') if flight_id]
+    if not ids:
+        return jsonify({'success': False, 'message': 'Au moins un vol est requis (ids)'}), 400
+    if len(ids) > SEAT_STREAM_MAX_FLIGHTS:
+        return jsonify({'success': False, 'message': f'{SEAT_STREAM_MAX_FLIGHTS} vols maximum par flux'}), 400
+    if not all(ObjectId.is_valid(flight_id) for flight_id in ids):
+        return jsonify({'success': False, 'message': 'ID de vol invalide'}), 400
+    if len(seat_updates) >= SEAT_STREAM_LIMIT:
+        return jsonify({'success': False, 'message': 'Trop de flux ouverts, réessayez plus tard'}), 503, {'Retry-After': '10'}
+
+    # Subscribe before reading the snapshot so no write falls in between
+    subscription = seat_updates.subscribe(ids)
+    try:
+        snapshot = fetch_seat_states(ids)
+    except Exception:
+        subscription.close()
+        raise
+    seat_feed.remember(snapshot)
+    seat_feed.ensure_started()
+
+    def events():
+        try:
+            yield 'retry: 3000\n\n'  # Reconnect delay once the stream closes
+            yield sse_event('seats', [snapshot[flight_id] for flight_id in ids])
+            closes_at = time.monotonic() + SEAT_STREAM_MAX_AGE
+            while time.monotonic() < closes_at:
+                updates = subscription.drain(SEAT_STREAM_HEARTBEAT)
+                # A comment line keeps proxies from closing an idle stream
+                yield sse_event('seats', list(updates.values())) if updates else ': keep-alive\n\n'
+        finally:
+            subscription.close()  # Also runs when the client disconnects
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return app.response_class(stream_with_context(events()), mimetype='text/event-stream', headers=headers)
+
+def load_route_graph():
+    since = datetime.datetime.utcnow() - datetime.timedelta(days=1)
+    return flights_collection.find({'schedule': {'$gte': since}}, {
+        'number': 1, 'departure': 1, 'arrival': 1, 'schedule': 1, 'duration': 1,
+        'price_numeric': 1, 'capacity': 1, 'passengers': 1, 'company': 1, 'class': 1
+    })
+
+@app.route(f'{API_PREFIX}/itineraries', methods=['GET'])
+def search_itineraries():
+    departure = request.args.get('departure')
+    arrival = request.args.get('arrival')
+    date = request.args.get('date')
+    sort = request.args.get('sort', 'price')
+    if not departure or not arrival or not date:
+        return jsonify({'success': False, 'message': 'Départ, arrivée et date sont requis'}), 400
+    if sort not in ITINERARY_SORT_KEYS:
+        return jsonify({'success': False, 'message': f"Tri invalide, valeurs possibles: {', '.join(ITINERARY_SORT_KEYS)}"}), 400
+    try:
+        day = datetime.datetime.strptime(date, '%Y-%m-%d')
+        max_connections = int(request.args.get('max_connections', 1))
+        passengers = int(request.args.get('passengers', 1))
+        min_connection = int(request.args.get('min_connection', 45))  # Minutes
+        max_connection = int(request.args.get('max_connection', 360))
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Paramètres invalides'}), 400
+    if not 0 <= max_connections <= MAX_CONNECTIONS:
+        return jsonify({'success': False, 'message': f'Nombre de correspondances entre 0 et {MAX_CONNECTIONS}'}), 400
+    if not 0 <= min_connection <= max_connection or passengers < 1 or not 1 <= limit <= MAX_ITINERARIES:
+        return jsonify({'success': False, 'message': 'Paramètres invalides'}), 400
+
+    route_graph.ensure_loaded(load_route_graph)
+    itineraries = route_graph.search(
+        departure, arrival, day, day + datetime.timedelta(days=1),
+        passengers=passengers,
+        max_connections=max_connections,
+        min_connection=datetime.timedelta(minutes=min_connection),
+        max_connection=datetime.timedelta(minutes=max_connection),
+        sort=sort,
+        limit=limit
+    )
+    return jsonify({'success': True, 'itineraries': itineraries}), 200
+
+@app.route(f'{API_PREFIX}/flights/import', methods=['POST'])
+def import_flights():
+    token = request.headers.get('Authorization')
+    if not token:
+        return jsonify({'success': False, 'message': 'Token manquant'}), 401
+
+    payload = verify_token(token)
+    if not payload or payload['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Accès non autorisé'}), 403
+
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    filename = upload.filename if upload else ''
+    default_format = 'csv' if filename.endswith('.csv') or request.mimetype == 'text/csv' else 'ndjson'
+    import_format = request.args.get('format', default_format)
+    mode = request.args.get('mode', 'insert')
+    if import_format not in FILE_FORMATS:
+        return jsonify({'success': False, 'message': f"Format invalide, valeurs possibles: {', '.join(FILE_FORMATS)}"}), 400
+    if mode not in IMPORT_MODES:
+        return jsonify({'success': False, 'message': f"Mode invalide, valeurs possibles: {', '.join(IMPORT_MODES)}"}), 400
+
+    allow_conflicts = request.args.get('allow_conflicts') == 'true'
+    summary = {'inserted': 0, 'updated': 0, 'errors': []}
+    created_at = datetime.datetime.utcnow().isoformat()
+    batch = []
+    try:
+        for line, data in read_flight_rows(stream, import_format):
+            try:
+                if isinstance(data, str):
+                    raise ValueError(data)
+                batch.append((line, with_search_keys(build_flight(data, default_date=created_at), FLIGHT_SHADOW_FIELDS)))
+            except ValueError as e:
+                summary['errors'].append({'line': line, 'message': str(e)})
+            if len(batch) == IMPORT_BATCH_SIZE:
+                write_flight_batch(batch, mode == 'upsert', summary, allow_conflicts)
+                batch = []
+        if batch:
+            write_flight_batch(batch, mode == 'upsert', summary, allow_conflicts)
+    except (UnicodeDecodeError, csv.Error) as e:
+        # Batches written before the unreadable part are kept
+        return jsonify(dict(summary, success=False, message=f'Fichier illisible: {e}')), 400
+
+    message = f"{summary['inserted']} vols ajoutés, {summary['updated']} mis à jour, {len(summary['errors'])} lignes rejetées"
+    return jsonify(dict(summary, success=True, message=message)), 200
+
 @app.route(f'{API_PREFIX}/planes', methods=['GET'])
 def get_planes():
     token = request.headers.get('Authorization')
@@ -365,22 +1501,17 @@ def get_planes():
     registration = request.args.get('registration')
     available = request.args.get('available')
 
+    if model or registration:
+        require_search_keys()
     if model:
-        query['model'] = {'$regex': model, '$options': 'i'}
+        query['model_lc'] = prefix_filter(model)
     if registration:
-        query['registration'] = {'$regex': registration, '$options': 'i'}
+        query['registration_lc'] = prefix_filter(registration)
     if available:
         query['available'] = available.lower() == 'true'
 
-    planes = list(planes_collection.find(query))
-    planes_response = [{
-        '_id': str(plane['_id']),
-        'model': plane['model'],
-        'registration': plane['registration'],
-        'capacity': plane['capacity'],
-        'available': plane['available']
-    } for plane in planes]
-    return jsonify({'success': True, 'planes': planes_response}), 200
+    planes = list(planes_collection.find(query, PLANE_PROJECTION))
+    return jsonify({'success': True, 'planes': planes}), 200
 
 @app.route(f'{API_PREFIX}/planes', methods=['POST'])
 def add_plane():
@@ -403,7 +1534,8 @@ def add_plane():
         'capacity': data['capacity'],
         'available': data['available']
     }
-    result = planes_collection.insert_one(plane)
+    result = planes_collection.insert_one(with_search_keys(plane, PLANE_SEARCH_FIELDS))
+    update_autocomplete(PLANE_SEARCH_FIELDS, None, plane)
     plane['_id'] = str(result.inserted_id)
     return jsonify({'success': True, 'plane': plane, 'message': 'Avion ajouté avec succès'}), 201
 
@@ -428,9 +1560,11 @@ def update_plane(id):
         'capacity': data['capacity'],
         'available': data['available']
     }
-    result = planes_collection.update_one({'_id': ObjectId(id)}, {'$set': plane})
-    if result.matched_count == 0:
+    previous = planes_collection.find_one_and_update({'_id': ObjectId(id)},
+                                                     {'$set': with_search_keys(plane, PLANE_SEARCH_FIELDS)})
+    if not previous:
         return jsonify({'success': False, 'message': 'Avion non trouvé'}), 404
+    update_autocomplete(PLANE_SEARCH_FIELDS, previous, plane)
 
     plane['_id'] = id
     return jsonify({'success': True, 'plane': plane, 'message': 'Avion modifié avec succès'}), 200
@@ -445,9 +1579,10 @@ def delete_plane(id):
     if not payload or payload['role'] != 'admin':
         return jsonify({'success': False, 'message': 'Accès non autorisé'}), 403
 
-    result = planes_collection.delete_one({'_id': ObjectId(id)})
-    if result.deleted_count == 0:
+    plane = planes_collection.find_one_and_delete({'_id': ObjectId(id)})
+    if not plane:
         return jsonify({'success': False, 'message': 'Avion non trouvé'}), 404
+    update_autocomplete(PLANE_SEARCH_FIELDS, plane, None)
 
     return jsonify({'success': True, 'message': 'Avion supprimé avec succès'}), 200
 
@@ -466,22 +1601,17 @@ def get_crews():
     main_role = request.args.get('mainRole')
     available = request.args.get('available')
 
+    if name or main_role:
+        require_search_keys()
     if name:
-        query['name'] = {'$regex': name, '$options': 'i'}
+        query['name_lc'] = prefix_filter(name)
     if main_role:
-        query['mainRole'] = {'$regex': main_role, '$options': 'i'}
+        query['mainRole_lc'] = prefix_filter(main_role)
     if available:
         query['available'] = available.lower() == 'true'
 
-    crews = list(crews_collection.find(query))
-    crews_response = [{
-        '_id': str(crew['_id']),
-        'name': crew['name'],
-        'members': crew['members'],
-        'mainRole': crew['mainRole'],
-        'available': crew['available']
-    } for crew in crews]
-    return jsonify({'success': True, 'crews': crews_response}), 200
+    crews = list(crews_collection.find(query, CREW_PROJECTION))
+    return jsonify({'success': True, 'crews': crews}), 200
 
 @app.route(f'{API_PREFIX}/crews', methods=['POST'])
 def add_crew():
@@ -504,7 +1634,8 @@ def add_crew():
         'mainRole': data['mainRole'],
         'available': data['available']
     }
-    result = crews_collection.insert_one(crew)
+    result = crews_collection.insert_one(with_search_keys(crew, CREW_SEARCH_FIELDS))
+    update_autocomplete(CREW_SEARCH_FIELDS, None, crew)
     crew['_id'] = str(result.inserted_id)
     return jsonify({'success': True, 'crew': crew, 'message': 'Équipage ajouté avec succès'}), 201
 
@@ -529,9 +1660,11 @@ def update_crew(id):
         'mainRole': data['mainRole'],
         'available': data['available']
     }
-    result = crews_collection.update_one({'_id': ObjectId(id)}, {'$set': crew})
-    if result.matched_count == 0:
+    previous = crews_collection.find_one_and_update({'_id': ObjectId(id)},
+                                                    {'$set': with_search_keys(crew, CREW_SEARCH_FIELDS)})
+    if not previous:
         return jsonify({'success': False, 'message': 'Équipage non trouvé'}), 404
+    update_autocomplete(CREW_SEARCH_FIELDS, previous, crew)
 
     crew['_id'] = id
     return jsonify({'success': True, 'crew': crew, 'message': 'Équipage modifié avec succès'}), 200
@@ -546,25 +1679,16 @@ def delete_crew(id):
     if not payload or payload['role'] != 'admin':
         return jsonify({'success': False, 'message': 'Accès non autorisé'}), 403
 
-    result = crews_collection.delete_one({'_id': ObjectId(id)})
-    if result.deleted_count == 0:
+    crew = crews_collection.find_one_and_delete({'_id': ObjectId(id)})
+    if not crew:
         return jsonify({'success': False, 'message': 'Équipage non trouvé'}), 404
+    update_autocomplete(CREW_SEARCH_FIELDS, crew, None)
 
     return jsonify({'success': True, 'message': 'Équipage supprimé avec succès'}), 200
 
 @app.route(f'{API_PREFIX}/promotions', methods=['GET'])
 def get_promotions():
-    promotions = list(promotions_collection.find())
-    promotions_response = [{
-        '_id': str(promo['_id']),
-        'destination': promo['destination'],
-        'description': promo['description'],
-        'image': promo['image'],
-        'oldPrice': promo['oldPrice'],
-        'newPrice': promo['newPrice'],
-        'discount': promo['discount']
-    } for promo in promotions]
-    return jsonify({'success': True, 'promotions': promotions_response}), 200
+    return conditional_json(*load_promotions()['response'])
 
 @app.route(f'{API_PREFIX}/promotions', methods=['POST'])
 def add_promotion():
@@ -590,6 +1714,7 @@ def add_promotion():
         'discount': float(data['discount'])
     }
     result = promotions_collection.insert_one(promotion)
+    promotion_cache.clear()
     promotion['_id'] = str(result.inserted_id)
     return jsonify({'success': True, 'promotion': promotion, 'message': 'Promotion ajoutée avec succès'}), 201
 
@@ -617,6 +1742,7 @@ def update_promotion(id):
         'discount': float(data['discount'])
     }
     result = promotions_collection.update_one({'_id': ObjectId(id)}, {'$set': promotion})
+    promotion_cache.clear()
     if result.matched_count == 0:
         return jsonify({'success': False, 'message': 'Promotion non trouvée'}), 404
 
@@ -634,11 +1760,62 @@ def delete_promotion(id):
         return jsonify({'success': False, 'message': 'Accès non autorisé'}), 403
 
     result = promotions_collection.delete_one({'_id': ObjectId(id)})
+    promotion_cache.clear()
     if result.deleted_count == 0:
         return jsonify({'success': False, 'message': 'Promotion non trouvée'}), 404
 
     return jsonify({'success': True, 'message': 'Promotion supprimée avec succès'}), 200
 
+@app.route(f'{API_PREFIX}/booking-context', methods=['GET'])
+def get_booking_context():
+    """Everything the booking page needs, for a flight or for one of the user's reservations."""
+    token = request.headers.get('Authorization')
+    if not token:
+        return jsonify({'success': False, 'message': 'Token manquant'}), 401
+
+    payload = verify_token(token)
+    if not payload:
+        return jsonify({'success': False, 'message': 'Token invalide ou expiré'}), 401
+
+    user = current_user_profile(payload)
+    if not user:
+        return jsonify({'success': False, 'message': 'Utilisateur non trouvé'}), 404
+
+    flight_id = request.args.get('flight_id')
+    reservation_id = request.args.get('reservation_id')
+    if reservation_id:
+        if not ObjectId.is_valid(reservation_id):
+            return jsonify({'success': False, 'message': 'Réservation non trouvée'}), 404
+        reservation = reservations_collection.find_one({'_id': ObjectId(reservation_id), 'user_id': payload['user_id']},
+                                                       {'flight_id': 1})
+        if not reservation:
+            return jsonify({'success': False, 'message': 'Réservation non trouvée'}), 404
+        flight_id = reservation['flight_id']
+    if not flight_id:
+        return jsonify({'success': False, 'message': 'flight_id ou reservation_id requis'}), 400
+    if not ObjectId.is_valid(flight_id):
+        return jsonify({'success': False, 'message': 'Vol non trouvé'}), 404
+
+    flight = flights_collection.find_one({'_id': ObjectId(flight_id)}, FLIGHT_PROJECTION)
+    if not flight and not reservation_id:
+        return jsonify({'success': False, 'message': 'Vol non trouvé'}), 404
+    # Served by the (user_id, flight_id) index; the user and promotions come from caches
+    reservations = list(reservations_collection.find({'user_id': payload['user_id'], 'flight_id': flight_id},
+                                                     RESERVATION_PROJECTION))
+    if not flight:
+        # The flight was deleted: the reservation can still be viewed and cancelled
+        return jsonify({'success': True, 'user': user, 'flight': None, 'seats_left': None,
+                        'promotion': None, 'unit_price': None, 'reservations': reservations}), 200
+    return jsonify({
+        'success': True,
+        'user': user,
+        'flight': flight,
+        'seats_left': max(flight['capacity'] - flight['passengers'], 0),
+        'promotion': find_promotion(flight['arrival']) if flight['promotion'] else None,
+        'unit_price': compute_total_price(flight, 1),
+        'reservations': reservations
+    }), 200
+
 @app.route(f'{API_PREFIX}/reservations', methods=['POST'])
 def create_reservation():
     token = request.headers.get('Authorization')
@@ -661,19 +1838,12 @@ def create_reservation():
         if not all(field in passenger for field in ['name', 'passport_number']):
             return jsonify({'success': False, 'message': 'Chaque passager doit avoir un nom et un numéro de passeport'}), 400
 
-    flight = flights_collection.find_one({'_id': ObjectId(data['flight_id'])})
+    # Hold the seats first: the conditional update is the capacity check
+    flight = reserve_seats(data['flight_id'], data['passengers'])
     if not flight:
-        return jsonify({'success': False, 'message': 'Vol non trouvé'}), 404
+        return seats_unavailable_response(data['flight_id'])
 
-    available_seats = flight['capacity'] - flight['passengers']
-    if data['passengers'] > available_seats:
-        return jsonify({'success': False, 'message': 'Pas assez de sièges disponibles'}), 400
-
-    total_price = data['passengers'] * flight['price_numeric']
-    if flight.get('promotion'):
-        promo = promotions_collection.find_one({'destination': flight['arrival']})
-        if promo:
-            total_price = data['passengers'] * promo['newPrice']
+    total_price = compute_total_price(flight, data['passengers'])
 
     reservation = {
         'user_id': payload['user_id'],
@@ -686,13 +1856,13 @@ def create_reservation():
         'created_at': datetime.datetime.utcnow().isoformat(),
         'updated_at': datetime.datetime.utcnow().isoformat()
     }
-    result = reservations_collection.insert_one(reservation)
-
-    # Update flight passengers
-    flights_collection.update_one(
-        {'_id': ObjectId(data['flight_id'])},
-        {'$inc': {'passengers': data['passengers']}}
-    )
+    try:
+        result = reservations_collection.insert_one(reservation)
+    except Exception as e:
+        # Give the held seats back so a failed insert never leaks capacity
+        reserve_seats(data['flight_id'], -data['passengers'])
+        print(f"Reservation error: {str(e)}")
+        return jsonify({'success': False, 'message': f'Erreur lors de la réservation: {str(e)}'}), 500
 
     reservation['_id'] = str(result.inserted_id)
     return jsonify({'success': True, 'reservation': reservation, 'message': 'Réservation créée avec succès'}), 201
@@ -723,20 +1893,14 @@ def update_reservation(id):
     if not reservation:
         return jsonify({'success': False, 'message': 'Réservation non trouvée ou non autorisée'}), 404
 
-    flight = flights_collection.find_one({'_id': ObjectId(data['flight_id'])})
+    # Hold the extra seats (or release the surplus) before touching the reservation
+    same_flight = data['flight_id'] == reservation['flight_id']
+    seats_held = data['passengers'] - reservation['passengers'] if same_flight else data['passengers']
+    flight = reserve_seats(data['flight_id'], seats_held)
     if not flight:
-        return jsonify({'success': False, 'message': 'Vol non trouvé'}), 404
+        return seats_unavailable_response(data['flight_id'])
 
-    # Calculate available seats, accounting for current reservation
-    available_seats = flight['capacity'] - flight['passengers'] + reservation['passengers']
-    if data['passengers'] > available_seats:
-        return jsonify({'success': False, 'message': 'Pas assez de sièges disponibles'}), 400
-
-    total_price = data['passengers'] * flight['price_numeric']
-    if flight.get('promotion'):
-        promo = promotions_collection.find_one({'destination': flight['arrival']})
-        if promo:
-            total_price = data['passengers'] * promo['newPrice']
+    total_price = compute_total_price(flight, data['passengers'])
 
     updated_reservation = {
         'flight_id': data['flight_id'],
@@ -747,19 +1911,23 @@ def update_reservation(id):
         'status': data.get('status', reservation['status']),
         'updated_at': datetime.datetime.utcnow().isoformat()
     }
-    result = reservations_collection.update_one(
-        {'_id': ObjectId(id)},
-        {'$set': updated_reservation}
-    )
+    try:
+        # Only apply if nobody changed the booking since we read it, otherwise
+        # the seat delta computed above would be wrong
+        result = reservations_collection.update_one(
+            {'_id': ObjectId(id), 'flight_id': reservation['flight_id'], 'passengers': reservation['passengers']},
+            {'$set': updated_reservation}
+        )
+    except Exception as e:
+        reserve_seats(data['flight_id'], -seats_held)
+        print(f"Reservation update error: {str(e)}")
+        return jsonify({'success': False, 'message': f'Erreur lors de la modification: {str(e)}'}), 500
     if result.matched_count == 0:
-        return jsonify({'success': False, 'message': 'Réservation non trouvée'}), 404
+        reserve_seats(data['flight_id'], -seats_held)
+        return jsonify({'success': False, 'message': 'Réservation modifiée entre-temps, veuillez réessayer'}), 409
 
-    # Update flight passengers
-    passenger_diff = data['passengers'] - reservation['passengers']
-    flights_collection.update_one(
-        {'_id': ObjectId(data['flight_id'])},
-        {'$inc': {'passengers': passenger_diff}}
-    )
+    if not same_flight:
+        reserve_seats(reservation['flight_id'], -reservation['passengers'])
 
     updated_reservation['_id'] = id
     updated_reservation['user_id'] = reservation['user_id']
@@ -775,22 +1943,26 @@ def delete_reservation(id):
     if not payload:
         return jsonify({'success': False, 'message': 'Token invalide ou expiré'}), 401
 
-    reservation = reservations_collection.find_one({'_id': ObjectId(id), 'user_id': payload['user_id']})
+    # Deleting first means concurrent deletes cannot release the seats twice
+    reservation = reservations_collection.find_one_and_delete({'_id': ObjectId(id), 'user_id': payload['user_id']})
     if not reservation:
         return jsonify({'success': False, 'message': 'Réservation non trouvée ou non autorisée'}), 404
 
-    # Update flight passengers
-    flights_collection.update_one(
-        {'_id': ObjectId(reservation['flight_id'])},
-        {'$inc': {'passengers': -reservation['passengers']}}
-    )
-
-    result = reservations_collection.delete_one({'_id': ObjectId(id)})
-    if result.deleted_count == 0:
-        return jsonify({'success': False, 'message': 'Réservation non trouvée'}), 404
+    reserve_seats(reservation['flight_id'], -reservation['passengers'])
 
     return jsonify({'success': True, 'message': 'Réservation supprimée avec succès'}), 200
 
+def attach_flight_summaries(reservations):
+    """Set reservation['flight'] for a page of reservations with a single $in query."""
+    flight_ids = {res['flight_id'] for res in reservations if ObjectId.is_valid(res.get('flight_id'))}
+    flights = {}
+    if flight_ids:
+        flights = {flight['_id']: flight for flight in flights_collection.find(
+            {'_id': {'$in': [ObjectId(flight_id) for flight_id in flight_ids]}}, FLIGHT_SUMMARY_PROJECTION)}
+    for res in reservations:
+        res['flight'] = flights.get(res.get('flight_id'))  # None once the flight is deleted
+    return reservations
+
 @app.route(f'{API_PREFIX}/reservations', methods=['GET'])
 def get_reservations():
     token = request.headers.get('Authorization')
@@ -801,20 +1973,25 @@ def get_reservations():
     if not payload:
         return jsonify({'success': False, 'message': 'Token invalide ou expiré'}), 401
 
-    reservations = list(reservations_collection.find({'user_id': payload['user_id']}))
-    reservations_response = [{
-        '_id': str(res['_id']),
-        'user_id': res['user_id'],
-        'flight_id': res['flight_id'],
-        'passengers': res['passengers'],
-        'passengers_details': res.get('passengers_details', []),
-        'class': res['class'],
-        'total_price': res['total_price'],
-        'status': res['status'],
-        'created_at': res['created_at'],
-        'updated_at': res['updated_at']
-    } for res in reservations]
-    return jsonify({'success': True, 'reservations': reservations_response}), 200
+    query = {'user_id': payload['user_id']}
+    limit = request.args.get('limit')
+    cursor_token = request.args.get('cursor')
+    paginate = bool(limit or cursor_token)
+    if paginate:
+        try:
+            limit = parse_page_size(limit) if limit else DEFAULT_PAGE_SIZE
+            reservations, next_cursor = keyset_page(reservations_collection, query, 'created_at', limit,
+                                                    cursor_token, RESERVATION_PROJECTION, DESCENDING)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+    else:
+        reservations = list(reservations_collection.find(query, RESERVATION_PROJECTION).sort(
+            [('created_at', DESCENDING), ('_id', DESCENDING)]))
+
+    attach_flight_summaries(reservations)
+    if paginate:
+        return jsonify({'success': True, 'reservations': reservations, 'next_cursor': next_cursor}), 200
+    return jsonify({'success': True, 'reservations': reservations}), 200
 
 @app.route(f'{API_PREFIX}/reports', methods=['GET'])
 def get_reports():
@@ -827,112 +2004,296 @@ def get_reports():
         return jsonify({'success': False, 'message': 'Accès non autorisé'}), 403
 
     period = request.args.get('period', 'this_month')
-    query = get_period_query(period)
+    source = request.args.get('source', 'rollup')
 
-    # Total flights
-    total_flights = flights_collection.count_documents(query)
+    if source == 'flights':
+        # Exact scan of the flights, e.g. to cross-check the rollups
+        reports = build_reports(flights_collection, get_period_query(period))
+    else:
+        ensure_built('flight_stats_daily', rebuild_flight_stats)  # First report after an upgrade
+        reports = build_reports_from_stats(get_period_days(period))
 
-    # Total passengers
-    pipeline_passengers = [
-        {"$match": query},
-        {"$group": {"_id": None, "total_passengers": {"$sum": "$passengers"}}}
-    ]
-    passengers_result = list(flights_collection.aggregate(pipeline_passengers))
-    total_passengers = passengers_result[0]['total_passengers'] if passengers_result else 0
+    return jsonify({'success': True, 'reports': reports}), 200
 
-    # Total revenues
-    pipeline_revenues = [
-        {"$match": query},
-        {
-            "$group": {
-                "_id": None,
-                "total_revenues": {
-                    "$sum": {
-                        "$multiply": [
-                            "$price_numeric",
-                            "$passengers"
-                        ]
-                    }
-                }
-            }
-        }
-    ]
-    revenues_result = list(flights_collection.aggregate(pipeline_revenues))
-    total_revenues = revenues_result[0]['total_revenues'] if revenues_result else 0
+@app.route(f'{API_PREFIX}/admin/reservations', methods=['GET'])
+def search_reservations():
+    token = request.headers.get('Authorization')
+    if not token:
+        return jsonify({'success': False, 'message': 'Token manquant'}), 401
 
-    # Occupancy rate
-    pipeline_occupancy = [
-        {"$match": query},
-        {"$group": {"_id": None, "total_passengers": {"$sum": "$passengers"}, "total_capacity": {"$sum": "$capacity"}}}
-    ]
-    occupancy_result = list(flights_collection.aggregate(pipeline_occupancy))
-    total_capacity = occupancy_result[0]['total_capacity'] if occupancy_result else 0
-    occupancy_rate = (total_passengers / total_capacity * 100) if total_capacity > 0 else 0
+    payload = verify_token(token)
+    if not payload or payload['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Accès non autorisé'}), 403
 
-    # Top destinations
-    pipeline_top_dest = [
-        {"$match": query},
-        {"$group": {"_id": "$arrival", "flights": {"$sum": 1}, "passengers": {"$sum": "$passengers"}}},
-        {"$sort": {"flights": -1}},
-        {"$limit": 3}
-    ]
-    top_destinations = list(flights_collection.aggregate(pipeline_top_dest))
-    top_dest_response = [{
-        'destination': dest['_id'],
-        'flights': dest['flights'],
-        'passengers': dest['passengers']
-    } for dest in top_destinations]
-
-    # Flights per month (for chart)
-    pipeline_flights_per_month = [
-        {"$match": query},
-        {"$group": {"_id": {"$dateToString": {"format": "%Y-%m", "date": {"$toDate": "$date"}}}, "count": {"$sum": 1}}},
-        {"$sort": {"_id": 1}}
-    ]
-    flights_per_month = list(flights_collection.aggregate(pipeline_flights_per_month))
-    flights_per_month_response = [{"month": month['_id'], "count": month['count']} for month in flights_per_month]
+    query = {}
+    flight_id = request.args.get('flight_id')
+    status = request.args.get('status')
+    passport = request.args.get('passport')
+    date_from = request.args.get('from')
+    date_to = request.args.get('to')
 
-    # Destination distribution (for chart)
-    pipeline_dest_dist = [
-        {"$match": query},
-        {"$group": {"_id": "$arrival", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}}
-    ]
-    dest_dist = list(flights_collection.aggregate(pipeline_dest_dist))
-    dest_dist_response = [{"destination": dest['_id'], "count": dest['count']} for dest in dest_dist]
+    if flight_id:
+        query['flight_id'] = flight_id
+    if status:
+        query['status'] = status
+    if passport:
+        query['passengers_details.passport_number'] = passport
+    try:
+        # created_at is an ISO 8601 string, so day bounds compare as strings
+        if date_from:
+            query.setdefault('created_at', {})['$gte'] = datetime.datetime.strptime(date_from, '%Y-%m-%d').strftime('%Y-%m-%d')
+        if date_to:
+            end = datetime.datetime.strptime(date_to, '%Y-%m-%d') + datetime.timedelta(days=1)
+            query.setdefault('created_at', {})['$lt'] = end.strftime('%Y-%m-%d')
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Date invalide, format AAAA-MM-JJ attendu'}), 400
+
+    if request.args.get('count') == 'true':
+        return jsonify({'success': True, 'count': reservations_collection.count_documents(query)}), 200
 
-    reports = {
-        'total_flights': total_flights,
-        'total_passengers': total_passengers,
-        'total_revenues': total_revenues,
-        'occupancy_rate': round(occupancy_rate, 2),
-        'top_destinations': top_dest_response,
-        'flights_per_month': flights_per_month_response,
-        'destination_distribution': dest_dist_response
-    }
+    try:
+        limit = parse_page_size(request.args.get('limit')) if request.args.get('limit') else DEFAULT_PAGE_SIZE
+        reservations, next_cursor = keyset_page(reservations_collection, query, 'created_at', limit,
+                                                request.args.get('cursor'), RESERVATION_PROJECTION, DESCENDING)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    attach_flight_summaries(reservations)
+    return jsonify({'success': True, 'reservations': reservations, 'next_cursor': next_cursor}), 200
+
+@app.route(f'{API_PREFIX}/admin/slow-queries', methods=['GET'])
+def get_slow_queries():
+    token = request.headers.get('Authorization')
+    if not token:
+        return jsonify({'success': False, 'message': 'Token manquant'}), 401
 
-    return jsonify({'success': True, 'reports': reports}), 200
+    payload = verify_token(token)
+    if not payload or payload['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Accès non autorisé'}), 403
+
+    entries = list(slow_query_profiler.entries)
+    if request.args.get('collscan') == 'true':
+        entries = [entry for entry in entries if entry['collscan']]
+    return jsonify({'success': True, 'slow_queries': entries[::-1]}), 200
+
+def export_chunks(cursor, fields, export_format):
+    """Yield the cursor's documents as NDJSON lines or CSV rows, one string per batch."""
+    buffer = io.StringIO()
+    writer = None
+    if export_format == 'csv':
+        writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        yield buffer.getvalue()  # Headers go out before the first batch is fetched
+        buffer.seek(0)
+        buffer.truncate()
+    count = 0
+    for document in cursor:
+        if writer:
+            writer.writerow({
+                key: value.isoformat() if isinstance(value, datetime.datetime)
+                else app.json.dumps(value) if isinstance(value, (list, dict)) else value
+                for key, value in document.items()
+            })
+        else:
+            buffer.write(app.json.dumps(document))
+            buffer.write('\n')
+        count += 1
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        # Sync flush so each batch reaches the client without waiting for the next
+        yield compressor.compress(chunk.encode()) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+def export_response(collection, projection, name):
+    """Stream a whole collection as an attachment; memory stays bounded by one batch."""
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in FILE_FORMATS:
+        return jsonify({'success': False, 'message': f"Format invalide, valeurs possibles: {', '.join(FILE_FORMATS)}"}), 400
+
+    cursor = collection.find({}, projection).sort('_id', ASCENDING).batch_size(EXPORT_BATCH_SIZE)
+    chunks = export_chunks(cursor, list(projection), export_format)
+    headers = {'Content-Disposition': f'attachment; filename={name}.{export_format}'}
+    if request.accept_encodings['gzip'] > 0:  # 'gzip;q=0' refuses it
+        chunks = gzip_chunks(chunks)
+        headers['Content-Encoding'] = 'gzip'
+        headers['Vary'] = 'Accept-Encoding'
+    else:
+        chunks = (chunk.encode() for chunk in chunks)
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    return app.response_class(stream_with_context(chunks), mimetype=mimetype, headers=headers)
+
+@app.route(f'{API_PREFIX}/admin/export/flights', methods=['GET'])
+def export_flights():
+    token = request.headers.get('Authorization')
+    if not token:
+        return jsonify({'success': False, 'message': 'Token manquant'}), 401
+
+    payload = verify_token(token)
+    if not payload or payload['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Accès non autorisé'}), 403
+
+    return export_response(flights_collection, FLIGHT_PROJECTION, 'flights')
+
+@app.route(f'{API_PREFIX}/admin/export/reservations', methods=['GET'])
+def export_reservations():
+    token = request.headers.get('Authorization')
+    if not token:
+        return jsonify({'success': False, 'message': 'Token manquant'}), 401
+
+    payload = verify_token(token)
+    if not payload or payload['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Accès non autorisé'}), 403
+
+    return export_response(reservations_collection, RESERVATION_PROJECTION, 'reservations')
+
+@app.route(f'{API_PREFIX}/availability', methods=['GET'])
+def get_availability():
+    token = request.headers.get('Authorization')
+    if not token:
+        return jsonify({'success': False, 'message': 'Token manquant'}), 401
+
+    payload = verify_token(token)
+    if not payload or payload['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Accès non autorisé'}), 403
+
+    try:
+        start = parse_schedule(request.args.get('start', ''))
+        end = parse_schedule(request.args.get('end', ''))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Créneau invalide, format ISO 8601 attendu (AAAA-MM-JJTHH:MM)'}), 400
+    if end <= start:
+        return jsonify({'success': False, 'message': 'La fin du créneau doit suivre son début'}), 400
+
+    schedule_index.ensure_loaded(load_schedule_index)
+    # Planes and crews marked unavailable (maintenance, leave) stay excluded
+    planes = [plane for plane in planes_collection.find({'available': {'$ne': False}}, PLANE_PROJECTION)
+              if not schedule_index.overlapping('plane', plane['registration'], start, end)]
+    crews = [crew for crew in crews_collection.find({'available': {'$ne': False}}, CREW_PROJECTION)
+             if not schedule_index.overlapping('crew', crew['name'], start, end)]
+    return jsonify({'success': True, 'planes': planes, 'crews': crews}), 200
+
+@app.route(f'{API_PREFIX}/autocomplete', methods=['GET'])
+def autocomplete():
+    field = request.args.get('field')
+    prefix = request.args.get('q', '')
+    if field not in AUTOCOMPLETE_SOURCES:
+        return jsonify({'success': False, 'message': f"Champ invalide, valeurs possibles: {', '.join(AUTOCOMPLETE_SOURCES)}"}), 400
+    if field not in PUBLIC_AUTOCOMPLETE_FIELDS:
+        token = request.headers.get('Authorization')
+        if not token:
+            return jsonify({'success': False, 'message': 'Token manquant'}), 401
+
+        payload = verify_token(token)
+        if not payload or payload['role'] != 'admin':
+            return jsonify({'success': False, 'message': 'Accès non autorisé'}), 403
+    try:
+        limit = int(request.args.get('limit', 10))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Paramètres invalides'}), 400
+    limit = max(1, min(limit, MAX_COMPLETIONS))
+
+    index = autocomplete_indexes[field]
+    index.ensure_loaded(lambda: ((group['_id'], group['count']) for group in AUTOCOMPLETE_SOURCES[field].aggregate([
+        {'$group': {'_id': f'${field}', 'count': {'$sum': 1}}}
+    ])))
+    return jsonify({'success': True, 'suggestions': index.complete(prefix, limit)}), 200
 
 @app.route(f'{API_PREFIX}/cities', methods=['GET'])
 def get_cities():
-    # Fetch unique departure and arrival cities
-    pipeline_departures = [
-        {"$group": {"_id": "$departure"}},
-        {"$sort": {"_id": 1}}
+    cached = city_cache.get('cities')
+    if cached is None:
+        ensure_built('cities', rebuild_city_catalog)  # First request after an upgrade
+        departures, arrivals = [], []
+        for city in cities_collection.find({'flights': {'$gt': 0}}, {'_id': 0, 'kind': 1, 'name': 1}).sort('name', ASCENDING):
+            (departures if city['kind'] == 'departure' else arrivals).append(city['name'])
+        cities = {
+            'departures': departures,
+            'arrivals': arrivals
+        }
+        cached = serialize_with_etag({'success': True, 'cities': cities})
+        city_cache.set('cities', cached)
+    return conditional_json(*cached)
+
+def build_reports(collection, query):
+    """Compute every report section in a single $facet pass over the matched flights."""
+    pipeline = [
+        {"$match": query},
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "flights": {"$sum": 1},
+                    "passengers": {"$sum": "$passengers"},
+                    "capacity": {"$sum": "$capacity"},
+                    "revenues": {"$sum": {"$multiply": ["$price_numeric", "$passengers"]}}
+                }}
+            ],
+            # Feeds both the top destinations and the destination distribution
+            "destinations": [
+                {"$group": {"_id": "$arrival", "flights": {"$sum": 1}, "passengers": {"$sum": "$passengers"}}},
+                {"$sort": {"flights": -1}}
+            ],
+            "months": [
+                {"$group": {"_id": {"$dateToString": {"format": "%Y-%m", "date": {"$toDate": "$date"}}}, "count": {"$sum": 1}}},
+                {"$sort": {"_id": 1}}
+            ]
+        }}
     ]
-    pipeline_arrivals = [
-        {"$group": {"_id": "$arrival"}},
-        {"$sort": {"_id": 1}}
+    return format_reports(next(collection.aggregate(pipeline)))
+
+def build_reports_from_stats(day_range):
+    """Same as build_reports, answered from the flight_stats_daily rollup."""
+    pipeline = [
+        {"$match": {"day": day_range}},
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "flights": {"$sum": "$flights"},
+                    "passengers": {"$sum": "$passengers"},
+                    "capacity": {"$sum": "$capacity"},
+                    "revenues": {"$sum": "$revenues"}
+                }}
+            ],
+            "destinations": [
+                {"$group": {"_id": "$destination", "flights": {"$sum": "$flights"}, "passengers": {"$sum": "$passengers"}}},
+                {"$match": {"flights": {"$gt": 0}}},  # Rows emptied by deletions
+                {"$sort": {"flights": -1}}
+            ],
+            "months": [
+                {"$group": {"_id": {"$substrCP": ["$day", 0, 7]}, "count": {"$sum": "$flights"}}},
+                {"$match": {"count": {"$gt": 0}}},
+                {"$sort": {"_id": 1}}
+            ]
+        }}
     ]
-    departures = [doc['_id'] for doc in flights_collection.aggregate(pipeline_departures) if doc['_id']]
-    arrivals = [doc['_id'] for doc in flights_collection.aggregate(pipeline_arrivals) if doc['_id']]
-    cities = {
-        'departures': sorted(list(set(departures))),
-        'arrivals': sorted(list(set(arrivals)))
+    return format_reports(next(flight_stats_collection.aggregate(pipeline)))
+
+def format_reports(result):
+    totals = result['totals'][0] if result['totals'] else {'flights': 0, 'passengers': 0, 'capacity': 0, 'revenues': 0}
+    occupancy_rate = (totals['passengers'] / totals['capacity'] * 100) if totals['capacity'] > 0 else 0
+
+    return {
+        'total_flights': totals['flights'],
+        'total_passengers': totals['passengers'],
+        'total_revenues': totals['revenues'],
+        'occupancy_rate': round(occupancy_rate, 2),
+        'top_destinations': [{
+            'destination': dest['_id'],
+            'flights': dest['flights'],
+            'passengers': dest['passengers']
+        } for dest in result['destinations'][:3]],
+        'flights_per_month': [{"month": month['_id'], "count": month['count']} for month in result['months']],
+        'destination_distribution': [{"destination": dest['_id'], "count": dest['flights']} for dest in result['destinations']]
     }
-    return jsonify({'success': True, 'cities': cities}), 200
 
-def get_period_query(period):
+def get_period_bounds(period):
     now = datetime.datetime.utcnow()
     if period == 'this_month':
         start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
@@ -947,7 +2308,102 @@ def get_period_query(period):
         start = datetime.datetime.min
         end = datetime.datetime.max
 
+    return start, end
+
+def get_period_query(period):
+    start, end = get_period_bounds(period)
     return {'date': {'$gte': start.isoformat(), '$lt': end.isoformat()}}
 
+def get_period_days(period):
+    # Rollups are per day: a bound falling inside a day includes that whole day
+    start, end = get_period_bounds(period)
+    day_range = {'$gte': start.date().isoformat()}
+    day_range['$lt' if end.time() == datetime.time.min else '$lte'] = end.date().isoformat()
+    return day_range
+
+@app.route('/healthz', methods=['GET'])
+def liveness():
+    # The process is up and serving; deliberately independent of MongoDB
+    return jsonify({'status': 'ok'}), 200
+
+@app.route('/readyz', methods=['GET'])
+def readiness():
+    try:
+        get_client().admin.command('ping')
+    except Exception as e:
+        return jsonify({'status': 'unavailable', 'message': str(e)}), 503
+    return jsonify({'status': 'ready'}), 200
+
+def configure_app(config=None):
+    """Apply `config` overrides (e.g. MONGO_URI, MONGO_MAX_POOL_SIZE) to the module's app and return it.
+
+    There is a single app per process, so this is not a factory: later calls
+    reconfigure the same app. No connection is opened here, so it is safe to
+    call before the server forks its workers (see wsgi.py).
+    """
+    global mongo_client, mongo_client_pid
+    if config:
+        app.config.update(config)
+        with mongo_client_lock:
+            # Settings changed: the next get_client() builds a fresh client
+            if mongo_client is not None and mongo_client_pid == os.getpid():
+                mongo_client.close()
+            mongo_client = None
+            mongo_client_pid = None
+    return app
+
+@app.cli.command('ensure-indexes')
+def ensure_indexes_command():
+    """Create or update the MongoDB indexes."""
+    ensure_indexes()
+    print('Index créés')
+
+@app.cli.command('migrate-schedules')
+def migrate_schedules_command():
+    """Convert legacy string schedules into BSON datetimes."""
+    operations = []
+    migrated = 0
+    invalid = []
+    for flight in flights_collection.find({'schedule': {'$type': 'string'}}, {'schedule': 1}):
+        try:
+            schedule = parse_schedule(flight['schedule'])
+        except ValueError:
+            invalid.append(str(flight['_id']))
+            continue
+        operations.append(UpdateOne({'_id': flight['_id']}, {'$set': {'schedule': schedule}}))
+        if len(operations) == 1000:
+            migrated += flights_collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        migrated += flights_collection.bulk_write(operations, ordered=False).modified_count
+    print(f'{migrated} vols migrés')
+    if invalid:
+        print(f"{len(invalid)} horaires non convertibles: {', '.join(invalid)}")
+
+@app.cli.command('rebuild-flight-stats')
+def rebuild_flight_stats_command():
+    """Rebuild the flight_stats_daily rollup used by /api/reports."""
+    rebuild_flight_stats()
+    mark_built('flight_stats_daily')
+    flight_stats_collection.create_index([('day', ASCENDING), ('destination', ASCENDING)],
+                                         name='day_destination', unique=True)
+    print(f'{flight_stats_collection.estimated_document_count()} agrégats journaliers reconstruits')
+
+@app.cli.command('rebuild-cities')
+def rebuild_cities_command():
+    """Rebuild the city catalog served by /api/cities."""
+    rebuild_city_catalog()
+    mark_built('cities')
+    cities_collection.create_index([('kind', ASCENDING), ('name', ASCENDING)], name='kind_name', unique=True)
+    print(f'{cities_collection.estimated_document_count()} villes reconstruites')
+
+@app.cli.command('backfill-search-keys')
+def backfill_search_keys_command():
+    """Fill the normalized *_lc fields used by the prefix filters."""
+    for name, updated in backfill_search_keys().items():
+        print(f'{name}: {updated} documents mis à jour')
+    mark_built('search_keys')
+
 if __name__ == '__main__':
+    ensure_indexes()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""Case- and accent-insensitive prefix completion for the admin filter boxes.
+
+Each completable field keeps its distinct values as a sorted array of
+(normalized key, value) pairs with reference counts: a prefix lookup is one
+bisection plus a short scan. The arrays are loaded lazily per process,
+reloaded after a TTL and adjusted in place on every write in this process.
+"""
+import bisect
+import threading
+import time
+import unicodedata
+
+
+def normalize_key(value):
+    """Fold case and strip accents, so that 'Équipage' and 'equipage' share a key."""
+    decomposed = unicodedata.normalize('NFKD', str(value))
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
+
+
+class PrefixIndex:
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = []  # sorted [(key, value)]
+        self._counts = {}  # (key, value) -> number of documents
+        self._loaded_at = None
+
+    def ensure_loaded(self, loader):
+        """(Re)build from `loader()`, an iterable of (value, document count), when missing or stale."""
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return
+            self._counts = {(normalize_key(value), value): count for value, count in loader() if value}
+            self._entries = sorted(self._counts)
+            self._loaded_at = time.monotonic()
+
+    def update(self, removed=None, added=None):
+        """Account for one document whose value changed from `removed` to `added`."""
+        if removed == added:
+            return
+        with self._lock:
+            if self._loaded_at is None:
+                return  # The next lookup loads the current state anyway
+            self._adjust(removed, -1)
+            self._adjust(added, 1)
+
+    def complete(self, prefix, limit=10):
+        key = normalize_key(prefix)
+        with self._lock:
+            index = bisect.bisect_left(self._entries, (key,))
+            values = []
+            for entry_key, value in self._entries[index:index + limit]:
+                if not entry_key.startswith(key):
+                    break
+                values.append(value)
+            return values
+
+    def _adjust(self, value, delta):
+        if not value:
+            return
+        entry = (normalize_key(value), value)
+        count = self._counts.get(entry, 0) + delta
+        if count > 0:
+            if entry not in self._counts:
+                bisect.insort(self._entries, entry)
+            self._counts[entry] = count
+        elif self._counts.pop(entry, None) is not None:
+            del self._entries[bisect.bisect_left(self._entries, entry)]
@@ -0,0 +1,8 @@
+"""Load tests and benchmarks for the Flask API.
+
+- run.py: mixed workloads (search, flash-sale booking, admin reports) against
+  the real endpoints, reporting throughput and p50/p95/p99 per endpoint as JSON
+- seed.py: synthetic users, flights, planes, crews, promotions and reservations
+- reservation_stress.py, reports_benchmark.py, login_benchmark.py: focused
+  benchmarks for seat reservation, /api/reports and password hashing
+"""
@@ -0,0 +1,104 @@
+"""Login storm benchmark: logins/sec and flight search latency under load.
+
+Creates throw-away users, measures `GET /api/flights` latency at rest, then
+again while a storm of `POST /api/login` calls runs in parallel. Run it
+once with the default hashing pool and once with `--inline` (hashing in the
+request worker, the previous behaviour) to compare.
+
+    python benchmarks/login_benchmark.py --threads 32 --duration 20
+    python benchmarks/login_benchmark.py --threads 32 --duration 20 --inline
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))] if samples else 0.0
+
+
+def measure_search(client, stop, samples, query):
+    while not stop.is_set():
+        start = time.perf_counter()
+        client.get(f'/api/flights?{query}')
+        samples.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=32, help='concurrent login clients')
+    parser.add_argument('--duration', type=float, default=20, help='seconds per phase')
+    parser.add_argument('--search', default='departure=Tunis&arrival=Paris', help='search query string')
+    parser.add_argument('--inline', action='store_true', help='hash in the request thread (PASSWORD_HASH_WORKERS=0)')
+    args = parser.parse_args()
+
+    if args.inline:
+        os.environ['PASSWORD_HASH_WORKERS'] = '0'
+    import app as backend
+
+    prefix = f'bench-login-{uuid.uuid4().hex[:6]}'
+    password = 'bench-password'
+    hashed = backend.generate_password_hash(password, backend.PASSWORD_HASH_METHOD)
+    backend.users_collection.insert_many([{
+        'firstName': 'Bench', 'lastName': str(i), 'username': f'{prefix}-{i}',
+        'email': f'{prefix}-{i}@bench.local', 'password': hashed, 'role': 'client'
+    } for i in range(args.users)])
+
+    try:
+        stop = threading.Event()
+        idle = []
+        searcher = threading.Thread(target=measure_search, args=(backend.app.test_client(), stop, idle, args.search))
+        searcher.start()
+        time.sleep(args.duration)
+        stop.set()
+        searcher.join()
+
+        stop = threading.Event()
+        storm = []
+        logins = [0] * args.threads
+        failures = [0] * args.threads
+
+        def login_loop(slot):
+            client = backend.app.test_client()
+            i = slot
+            while not stop.is_set():
+                response = client.post('/api/login', json={'username': f'{prefix}-{i % args.users}', 'password': password})
+                if response.status_code == 200:
+                    logins[slot] += 1
+                else:
+                    failures[slot] += 1
+                i += args.threads
+
+        workers = [threading.Thread(target=login_loop, args=(slot,)) for slot in range(args.threads)]
+        searcher = threading.Thread(target=measure_search, args=(backend.app.test_client(), stop, storm, args.search))
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        searcher.start()
+        time.sleep(args.duration)
+        stop.set()
+        for worker in workers + [searcher]:
+            worker.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        backend.users_collection.delete_many({'username': {'$regex': f'^{prefix}-'}})
+
+    mode = 'inline' if args.inline else f'pool({backend.PASSWORD_HASH_WORKERS})'
+    print(f'hashing={mode} method={backend.PASSWORD_HASH_METHOD}')
+    print(f'logins/sec={sum(logins) / elapsed:.1f} failed={sum(failures)}')
+    for label, samples in (('idle', idle), ('storm', storm)):
+        print(f'search {label}: n={len(samples)} p50={statistics.median(samples) if samples else 0:.1f}ms '
+              f'p95={percentile(samples, 95):.1f}ms p99={percentile(samples, 99):.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
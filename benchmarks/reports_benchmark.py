@@ -0,0 +1,90 @@
+"""Latency benchmark for /api/reports: seven-pass legacy plan vs single $facet.
+
+Seeds a dedicated database (default `tunisair_bench`, never the application
+database) with synthetic flights, then times both implementations for each
+report period.
+
+    python benchmarks/reports_benchmark.py --flights 1000000 --repeat 5
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as backend
+from benchmarks.seed import generate_flights, insert_batches
+
+PERIODS = ['this_month', 'last_3_months', 'this_year', 'all']
+
+
+def seed(collection, count, batch_size=10000):
+    rng = random.Random(42)
+    # Reports only need the occupancy, not matching reservations
+    flights = (dict(f, passengers=rng.randint(0, f['capacity'])) for f in generate_flights(count, rng))
+    insert_batches(collection, flights, batch_size)
+
+
+def legacy_reports(collection, query):
+    """The previous implementation: one count plus six aggregations, each a full pass."""
+    total_flights = collection.count_documents(query)
+    passengers = list(collection.aggregate([
+        {"$match": query}, {"$group": {"_id": None, "total_passengers": {"$sum": "$passengers"}}}]))
+    revenues = list(collection.aggregate([
+        {"$match": query},
+        {"$group": {"_id": None, "total_revenues": {"$sum": {"$multiply": ["$price_numeric", "$passengers"]}}}}]))
+    occupancy = list(collection.aggregate([
+        {"$match": query},
+        {"$group": {"_id": None, "total_passengers": {"$sum": "$passengers"}, "total_capacity": {"$sum": "$capacity"}}}]))
+    top = list(collection.aggregate([
+        {"$match": query},
+        {"$group": {"_id": "$arrival", "flights": {"$sum": 1}, "passengers": {"$sum": "$passengers"}}},
+        {"$sort": {"flights": -1}}, {"$limit": 3}]))
+    months = list(collection.aggregate([
+        {"$match": query},
+        {"$group": {"_id": {"$dateToString": {"format": "%Y-%m", "date": {"$toDate": "$date"}}}, "count": {"$sum": 1}}},
+        {"$sort": {"_id": 1}}]))
+    distribution = list(collection.aggregate([
+        {"$match": query}, {"$group": {"_id": "$arrival", "count": {"$sum": 1}}}, {"$sort": {"count": -1}}]))
+    return total_flights, passengers, revenues, occupancy, top, months, distribution
+
+
+def time_call(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--flights', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--database', default='tunisair_bench')
+    parser.add_argument('--reseed', action='store_true', help='drop and reseed even if the size matches')
+    args = parser.parse_args()
+
+    if args.database == backend.app.config['MONGO_DB_NAME']:
+        parser.error('refusing to seed the application database')
+    collection = backend.get_client()[args.database]['flights']
+    if args.reseed or collection.estimated_document_count() != args.flights:
+        collection.drop()
+        print(f'Seeding {args.flights} flights into {args.database}...')
+        seed(collection, args.flights)
+        collection.create_index('date')
+
+    print(f"{'period':<15}{'legacy ms':>12}{'facet ms':>12}{'speedup':>10}")
+    for period in PERIODS:
+        query = backend.get_period_query(period)
+        legacy = time_call(lambda: legacy_reports(collection, query), args.repeat)
+        fused = time_call(lambda: backend.build_reports(collection, query), args.repeat)
+        print(f'{period:<15}{legacy:>12.1f}{fused:>12.1f}{legacy / fused:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""Concurrency stress test for seat reservations.
+
+Fires thousands of parallel bookings at a single flight through the real
+`POST /api/reservations` handler and checks that the flight is never
+oversold. The `legacy` mode replays the previous find / check / insert / $inc
+sequence behind a benchmark-only route with the same token check and payload
+validation, so both modes go through the Flask test client and their
+bookings/sec are comparable.
+
+The test flight is written to a dedicated database (default `tunisair_bench`,
+never the application database) and its creation, bookings and deletion all
+go through `on_flights_changed`, so the derived data ends where it started.
+
+Usage (needs the MongoDB instance app.py connects to):
+
+    python benchmarks/reservation_stress.py --bookings 5000 --threads 64 --capacity 1000
+"""
+import argparse
+import datetime
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import jsonify, request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson.objectid import ObjectId
+
+import app as backend
+
+
+def create_flight(capacity):
+    flight = {
+        'number': f'STRESS-{uuid.uuid4().hex[:8]}',
+        'departure': 'Tunis',
+        'arrival': 'Paris',
+        'plane': 'Airbus A320',
+        'crew': 'Équipage 1',
+        'schedule': datetime.datetime.utcnow() + datetime.timedelta(days=30),
+        'price': '150 €',
+        'price_numeric': 150.0,
+        'promotion': '',
+        'status': "A l'heure",
+        'date': datetime.datetime.utcnow().isoformat(),
+        'passengers': 0,
+        'capacity': capacity,
+        'class': 'economique',
+        'company': 'Tunisair',
+        'duration': 2.5,
+        'escales': '0'
+    }
+    stored = backend.with_search_keys(flight, backend.FLIGHT_SHADOW_FIELDS)
+    backend.flights_collection.insert_one(stored)
+    backend.on_flights_changed([(None, stored)])
+    return str(stored['_id'])
+
+
+def delete_flight(flight_id):
+    backend.reservations_collection.delete_many({'flight_id': flight_id})
+    flight = backend.flights_collection.find_one_and_delete({'_id': ObjectId(flight_id)})
+    if flight:
+        backend.on_flights_changed([(flight, None)])
+
+
+def booking_payload(flight_id, seats):
+    return {
+        'flight_id': flight_id,
+        'passengers': seats,
+        'class': 'economique',
+        'passengers_details': [
+            {'name': f'Passager {i}', 'passport_number': uuid.uuid4().hex[:9]} for i in range(seats)
+        ]
+    }
+
+
+LEGACY_ROUTE = '/benchmarks/legacy-reservations'
+ROUTES = {'atomic': f'{backend.API_PREFIX}/reservations', 'legacy': LEGACY_ROUTE}
+
+
+def legacy_create_reservation():
+    """The pre-atomic handler: find, check, insert, then $inc, with a race window."""
+    payload = backend.verify_token(request.headers.get('Authorization', ''))
+    if not payload:
+        return jsonify({'success': False}), 401
+    data = request.json
+    if len(data['passengers_details']) != data['passengers']:
+        return jsonify({'success': False}), 400
+    flight = backend.flights_collection.find_one({'_id': ObjectId(data['flight_id'])})
+    if flight['capacity'] - flight['passengers'] < data['passengers']:
+        return jsonify({'success': False}), 409
+    reservation = {
+        'user_id': payload['user_id'],
+        'flight_id': data['flight_id'],
+        'passengers': data['passengers'],
+        'passengers_details': data['passengers_details'],
+        'class': data['class'],
+        'total_price': backend.compute_total_price(flight, data['passengers']),
+        'status': 'confirmed',
+        'created_at': datetime.datetime.utcnow().isoformat(),
+        'updated_at': datetime.datetime.utcnow().isoformat()
+    }
+    result = backend.reservations_collection.insert_one(reservation)
+    backend.flights_collection.update_one({'_id': ObjectId(data['flight_id'])}, {'$inc': {'passengers': data['passengers']}})
+    # Same derived-data cost as the atomic handler; the delta is right even from a stale read
+    backend.on_flights_changed([(flight, dict(flight, passengers=flight['passengers'] + data['passengers']))])
+    reservation['_id'] = str(result.inserted_id)
+    return jsonify({'success': True, 'reservation': reservation}), 201
+
+
+# Registered before the first request, as Flask requires
+backend.app.add_url_rule(LEGACY_ROUTE, 'legacy_create_reservation', legacy_create_reservation, methods=['POST'])
+
+
+def run(mode, bookings, threads, capacity, seats):
+    flight_id = create_flight(capacity)
+    token = backend.generate_token('stress-user', 'client', 'stress')
+    headers = {'Authorization': f'Bearer {token}'}
+    local = threading.local()
+
+    def book(_):
+        if not hasattr(local, 'client'):
+            local.client = backend.app.test_client()
+        response = local.client.post(ROUTES[mode], json=booking_payload(flight_id, seats), headers=headers)
+        return response.status_code == 201
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        accepted = sum(pool.map(book, range(bookings)))
+    elapsed = time.perf_counter() - start
+
+    flight = backend.flights_collection.find_one({'_id': ObjectId(flight_id)})
+    booked = sum(r['passengers'] for r in backend.reservations_collection.find({'flight_id': flight_id}, {'passengers': 1}))
+    delete_flight(flight_id)
+
+    return {
+        'mode': mode,
+        'attempts': bookings,
+        'accepted': accepted,
+        'seats_booked': booked,
+        'passengers_counter': flight['passengers'],
+        'capacity': capacity,
+        'oversold': max(0, booked - capacity),
+        'counter_drift': flight['passengers'] - booked,
+        'bookings_per_sec': round(bookings / elapsed, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bookings', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=64)
+    parser.add_argument('--capacity', type=int, default=1000)
+    parser.add_argument('--seats', type=int, default=1, help='seats per booking')
+    parser.add_argument('--mode', choices=['atomic', 'legacy', 'both'], default='both')
+    parser.add_argument('--database', default='tunisair_bench')
+    args = parser.parse_args()
+
+    if args.database == backend.app.config['MONGO_DB_NAME']:
+        parser.error('refusing to write to the application database')
+    backend.app.config['MONGO_DB_NAME'] = args.database
+
+    modes = ['legacy', 'atomic'] if args.mode == 'both' else [args.mode]
+    failed = False
+    for mode in modes:
+        result = run(mode, args.bookings, args.threads, args.capacity, args.seats)
+        print(' '.join(f'{key}={value}' for key, value in result.items()))
+        if mode == 'atomic' and (result['oversold'] or result['counter_drift']):
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
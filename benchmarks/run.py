@@ -0,0 +1,230 @@
+"""Mixed-workload load test for the Flask API.
+
+Seeds a dedicated database, replays the weighted request mixes from
+workloads.py with concurrent clients and writes throughput and p50/p95/p99
+latency per endpoint to a JSON file, so that releases can be compared.
+
+    python -m benchmarks.run --workload search --duration 30 --threads 16
+    python -m benchmarks.run --workload all --scale 0.1 --in-memory
+    python -m benchmarks.run --workload flash-sale --base-url http://localhost:5000 --no-seed
+
+By default requests go through Flask's test client in this process; with
+--base-url they are sent over HTTP to a running server, which must use the
+same MONGO_URI/MONGO_DB_NAME and JWT_SECRET_KEY.
+"""
+import argparse
+import datetime
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.workloads import WORKLOADS
+
+
+class HttpResponse:
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self.data = data
+
+
+class HttpClient:
+    """Minimal keep-alive client exposing the subset of the Flask test client API we use."""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.connection = None
+
+    def request(self, method, path, payload=None, headers=None):
+        body = None
+        headers = dict(headers or {})
+        if payload is not None:
+            body = json.dumps(payload).encode()
+            headers['Content-Type'] = 'application/json'
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                return HttpResponse(response.status, response.read())
+            except (http.client.HTTPException, OSError):
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+
+    def get(self, path, headers=None):
+        return self.request('GET', path, headers=headers)
+
+    def post(self, path, json=None, headers=None):
+        return self.request('POST', path, payload=json, headers=headers)
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    return round(samples[min(len(samples) - 1, int(len(samples) * pct / 100))], 3)
+
+
+def run_workload(name, ctx, make_client, threads, duration, rng_seed):
+    operations = WORKLOADS[name]
+    weights = [weight for weight, _ in operations]
+    results = {}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def worker(slot):
+        rng = random.Random(rng_seed + slot)
+        client = make_client()
+        local = {}
+        while not stop.is_set():
+            operation = rng.choices(operations, weights)[0][1]
+            start = time.perf_counter()
+            try:
+                endpoint, response = operation(ctx, client, rng)
+                status = response.status_code
+            except Exception as e:
+                endpoint, status = operation.__name__, type(e).__name__
+            elapsed = (time.perf_counter() - start) * 1000
+            stats = local.setdefault(endpoint, {'latencies': [], 'statuses': {}})
+            stats['latencies'].append(elapsed)
+            stats['statuses'][str(status)] = stats['statuses'].get(str(status), 0) + 1
+        with lock:
+            for endpoint, stats in local.items():
+                merged = results.setdefault(endpoint, {'latencies': [], 'statuses': {}})
+                merged['latencies'] += stats['latencies']
+                for status, count in stats['statuses'].items():
+                    merged['statuses'][status] = merged['statuses'].get(status, 0) + count
+
+    workers = [threading.Thread(target=worker, args=(slot,)) for slot in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for endpoint, stats in sorted(results.items()):
+        latencies = sorted(stats['latencies'])
+        errors = sum(count for status, count in stats['statuses'].items() if not status.isdigit() or int(status) >= 500)
+        endpoints[endpoint] = {
+            'requests': len(latencies),
+            'throughput_rps': round(len(latencies) / elapsed, 2),
+            'errors': errors,
+            'statuses': stats['statuses'],
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'max_ms': round(latencies[-1], 3) if latencies else None
+        }
+    total = sum(e['requests'] for e in endpoints.values())
+    return {
+        'workload': name,
+        'duration_s': round(elapsed, 2),
+        'threads': threads,
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 2),
+        'endpoints': endpoints
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workload', choices=sorted(WORKLOADS) + ['all'], default='all')
+    parser.add_argument('--duration', type=float, default=30, help='seconds per workload')
+    parser.add_argument('--threads', type=int, default=16, help='concurrent clients')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplier on seed.VOLUMES')
+    parser.add_argument('--database', default='tunisair_bench')
+    parser.add_argument('--in-memory', action='store_true', help='use mongomock instead of MongoDB')
+    parser.add_argument('--base-url', help='send requests over HTTP to this server')
+    parser.add_argument('--no-seed', action='store_true', help='reuse the data already in --database')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='bench_results.json')
+    args = parser.parse_args()
+
+    # The database app.py would use without the override below
+    if args.database == os.environ.get('MONGO_DB_NAME', 'tunisair_db'):
+        parser.error('refusing to reseed the application database, pick another --database')
+    os.environ['MONGO_DB_NAME'] = args.database
+    if args.in_memory:
+        # mongomock lacks some aggregation and projection operators: the seed
+        # skips the report rollup and city catalog rebuilds, and the endpoints
+        # relying on such operators show up as 5xx errors
+        import mongomock
+        mongomock.patch(servers=(('localhost', 27017),)).start()
+    import app as backend
+    from benchmarks.seed import seed, PASSWORD
+
+    started = time.perf_counter()
+    if args.no_seed:
+        users = [(str(u['_id']), u['username']) for u in backend.users_collection.find({'role': 'client'}, {'username': 1}).limit(5000)]
+        flights = list(backend.flights_collection.find({}, {'departure': 1, 'arrival': 1, 'schedule': 1,
+                                                            'capacity': 1, 'passengers': 1}).limit(50000))
+        flights.sort(key=lambda f: f.get('capacity', 0) - f.get('passengers', 0), reverse=True)
+        ctx = {
+            'volumes': {'users': len(users), 'flights': len(flights)},
+            'routes': sorted({(f['departure'], f['arrival']) for f in flights}),
+            'dates': sorted({f['schedule'].date().isoformat() for f in flights if isinstance(f.get('schedule'), datetime.datetime)}),
+            'flight_ids': [str(f['_id']) for f in flights],
+            'hot_flight_ids': [str(f['_id']) for f in flights[:20]],
+            'users': users,
+            'password': PASSWORD
+        }
+    else:
+        print(f'Seeding {args.database} (scale {args.scale})...', file=sys.stderr)
+        ctx = seed(backend, scale=args.scale, rng_seed=args.seed, rebuild=not args.in_memory)
+    seed_seconds = time.perf_counter() - started
+
+    ctx['user_tokens'] = [backend.generate_token(user_id, 'client', username) for user_id, username in ctx['users'][:1000]]
+    admin_token = backend.generate_token('admin', 'admin', 'admin', 'Admin', 'User', 'admin@tunisair.com')
+    ctx['admin_headers'] = {'Authorization': f'Bearer {admin_token}'}
+    make_client = (lambda: HttpClient(args.base_url)) if args.base_url else backend.app.test_client
+
+    workloads = sorted(WORKLOADS) if args.workload == 'all' else [args.workload]
+    report = {
+        'timestamp': datetime.datetime.utcnow().isoformat(),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'target': args.base_url or ('in-process (mongomock)' if args.in_memory else 'in-process'),
+        'database': args.database,
+        'volumes': ctx['volumes'],
+        'seed_seconds': round(seed_seconds, 1),
+        'workloads': []
+    }
+    for name in workloads:
+        print(f'Running {name} for {args.duration}s with {args.threads} clients...', file=sys.stderr)
+        result = run_workload(name, ctx, make_client, args.threads, args.duration, args.seed)
+        report['workloads'].append(result)
+        for endpoint, stats in result['endpoints'].items():
+            print(f"  {endpoint:<32}{stats['throughput_rps']:>9} rps  p50={stats['p50_ms']}ms "
+                  f"p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms errors={stats['errors']}", file=sys.stderr)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Results written to {args.output}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
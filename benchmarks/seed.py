@@ -0,0 +1,164 @@
+"""Synthetic data for the benchmarks, shaped like the documents app.py writes."""
+import datetime
+import random
+
+from werkzeug.security import generate_password_hash
+
+from autocomplete import normalize_key
+
+CITIES = ['Tunis', 'Paris', 'Lyon', 'Marseille', 'Rome', 'Milan', 'Madrid', 'Barcelone', 'Istanbul',
+          'Le Caire', 'Casablanca', 'Alger', 'Djerba', 'Monastir', 'Sfax', 'Francfort', 'Bruxelles',
+          'Genève', 'Londres', 'Montréal']
+COMPANIES = ['Tunisair', 'Tunisair Express', 'Nouvelair', 'Air France', 'Lufthansa', 'Turkish Airlines']
+PLANE_MODELS = ['Airbus A320', 'Airbus A330', 'Boeing 737', 'ATR 72']
+CREW_ROLES = ['Pilote', 'Copilote', 'Chef de cabine', 'Hôtesse', 'Steward']
+
+# Volumes at scale 1.0
+VOLUMES = {
+    'users': 20000,
+    'flights': 50000,
+    'planes': 150,
+    'crews': 200,
+    'promotions': 40,
+    'reservations': 100000
+}
+PASSWORD = 'bench-password'
+
+
+def generate_flights(count, rng=None, now=None, routes=None):
+    """Yield flight documents; `date` spans the past two years, `schedule` the next 90 days."""
+    rng = rng or random.Random(42)
+    now = now or datetime.datetime.utcnow()
+    for i in range(count):
+        departure, arrival = rng.choice(routes) if routes else rng.sample(CITIES, 2)
+        capacity = rng.choice([70, 150, 180, 220])
+        price = rng.randint(80, 900)
+        flight = {
+            'number': f'TU{i:07d}',
+            'departure': departure,
+            'arrival': arrival,
+            'plane': rng.choice(PLANE_MODELS),
+            'crew': f'Équipage {rng.randint(1, 200)}',
+            'schedule': (now + datetime.timedelta(minutes=rng.randint(60, 90 * 24 * 60))).replace(second=0, microsecond=0),
+            'price': f'{price} €',
+            'price_numeric': float(price),
+            'promotion': 'oui' if rng.random() < 0.1 else '',
+            'status': "A l'heure",
+            'date': (now - datetime.timedelta(minutes=rng.randint(0, 2 * 365 * 24 * 60))).isoformat(),
+            'passengers': 0,
+            'capacity': capacity,
+            'class': rng.choice(['economique', 'economique', 'affaires']),
+            'company': rng.choice(COMPANIES),
+            'duration': round(rng.uniform(0.8, 8), 1),
+            'escales': rng.choice(['0', '0', '0', '1'])
+        }
+        for field in ('company', 'plane', 'crew'):
+            flight[f'{field}_lc'] = normalize_key(flight[field])
+        yield flight
+
+
+def insert_batches(collection, documents, batch_size):
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) == batch_size:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+
+
+def seed(backend, scale=1.0, rng_seed=42, batch_size=5000, rebuild=True):
+    """Drop and reseed every collection of `backend` (the imported app module).
+
+    `rebuild=False` skips the report rollup and city catalog rebuilds, whose
+    aggregations mongomock cannot run. Returns the sample data the workloads
+    draw their requests from.
+    """
+    rng = random.Random(rng_seed)
+    volumes = {name: max(1, int(count * scale)) for name, count in VOLUMES.items()}
+    for collection in (backend.users_collection, backend.flights_collection, backend.planes_collection,
+                       backend.crews_collection, backend.promotions_collection, backend.reservations_collection):
+        collection.drop()
+
+    # One hash for everybody: the KDF would otherwise dominate seeding time
+    password_hash = generate_password_hash(PASSWORD, backend.PASSWORD_HASH_METHOD)
+    users = [{
+        'firstName': 'Client',
+        'lastName': str(i),
+        'username': f'client{i}',
+        'email': f'client{i}@bench.local',
+        'password': password_hash,
+        'role': 'client'
+    } for i in range(volumes['users'])]
+    insert_batches(backend.users_collection, users, batch_size)
+
+    # A few dozen popular routes so that searches return several flights
+    routes = [tuple(rng.sample(CITIES, 2)) for _ in range(60)]
+    flights = list(generate_flights(volumes['flights'], rng, routes=routes))
+
+    reservations = []
+    for _ in range(volumes['reservations']):
+        flight = rng.choice(flights)
+        seats = rng.randint(1, 3)
+        if flight['passengers'] + seats > flight['capacity']:
+            continue
+        flight['passengers'] += seats
+        reservations.append((flight, seats, rng.choice(users)))
+    insert_batches(backend.flights_collection, flights, batch_size)
+
+    created_at = datetime.datetime.utcnow()
+    insert_batches(backend.reservations_collection, ({
+        'user_id': str(user['_id']),
+        'flight_id': str(flight['_id']),
+        'passengers': seats,
+        'passengers_details': [{'name': f'Passager {n}', 'passport_number': f'P{rng.randint(0, 10 ** 8):08d}'}
+                               for n in range(seats)],
+        'class': flight['class'],
+        'total_price': seats * flight['price_numeric'],
+        'status': 'confirmed',
+        'created_at': (created_at - datetime.timedelta(minutes=rng.randint(0, 365 * 24 * 60))).isoformat(),
+        'updated_at': created_at.isoformat()
+    } for flight, seats, user in reservations), batch_size)
+
+    planes = [{
+        'model': rng.choice(PLANE_MODELS),
+        'registration': f'TS-{chr(65 + i // 26 % 26)}{chr(65 + i % 26)}{i:03d}',
+        'capacity': rng.choice([70, 150, 180, 220]),
+        'available': rng.random() < 0.8
+    } for i in range(volumes['planes'])]
+    crews = [{
+        'name': f'Équipage {i + 1}',
+        'members': rng.randint(4, 12),
+        'mainRole': rng.choice(CREW_ROLES),
+        'available': rng.random() < 0.8
+    } for i in range(volumes['crews'])]
+    backend.planes_collection.insert_many([backend.with_search_keys(plane, backend.PLANE_SEARCH_FIELDS)
+                                           for plane in planes])
+    backend.crews_collection.insert_many([backend.with_search_keys(crew, backend.CREW_SEARCH_FIELDS)
+                                          for crew in crews])
+    backend.promotions_collection.insert_many([{
+        'destination': city,
+        'description': f'Offre spéciale {city}',
+        'image': f'assets/{city.lower()}.jpg',
+        'oldPrice': 400.0,
+        'newPrice': 299.0,
+        'discount': 25.0
+    } for city in rng.sample(CITIES, min(len(CITIES), volumes['promotions']))])
+
+    backend.ensure_indexes()
+    if rebuild:
+        backend.rebuild_flight_stats()
+        backend.rebuild_city_catalog()
+
+    by_load = sorted(flights, key=lambda f: f['capacity'] - f['passengers'], reverse=True)
+    return {
+        'volumes': volumes,
+        'routes': routes,
+        'dates': sorted({f['schedule'].date().isoformat() for f in flights}),
+        'flight_ids': [str(f['_id']) for f in flights],
+        # Flash sales target a handful of flights with plenty of free seats
+        'hot_flight_ids': [str(f['_id']) for f in by_load[:20]],
+        'users': [(str(u['_id']), u['username']) for u in users],
+        'password': PASSWORD
+    }
@@ -0,0 +1,106 @@
+"""Request mixes replayed by benchmarks/run.py.
+
+Each operation takes (ctx, client, rng) and returns (endpoint, response);
+the endpoint is the route template so that results aggregate per handler.
+"""
+from urllib.parse import urlencode
+
+
+def search_flights(ctx, client, rng):
+    departure, arrival = rng.choice(ctx['routes'])
+    params = {'departure': departure, 'arrival': arrival, 'date': rng.choice(ctx['dates'])}
+    if rng.random() < 0.3:
+        params['class'] = rng.choice(['economique', 'affaires'])
+    return 'GET /api/flights?search', client.get(f'/api/flights?{urlencode(params)}')
+
+
+def search_flights_page(ctx, client, rng):
+    departure, arrival = rng.choice(ctx['routes'])
+    params = {'departure': departure, 'arrival': arrival, 'sort': 'price_numeric', 'limit': 20}
+    return 'GET /api/flights?page', client.get(f'/api/flights?{urlencode(params)}')
+
+
+def get_flight(ctx, client, rng):
+    return 'GET /api/flights?flight_id', client.get(f"/api/flights?flight_id={rng.choice(ctx['flight_ids'])}")
+
+
+def get_cities(ctx, client, rng):
+    return 'GET /api/cities', client.get('/api/cities')
+
+
+def get_promotions(ctx, client, rng):
+    return 'GET /api/promotions', client.get('/api/promotions')
+
+
+def validate_token(ctx, client, rng):
+    return 'GET /api/validate-token', client.get('/api/validate-token', headers=user_headers(ctx, rng))
+
+
+def create_reservation(ctx, client, rng):
+    seats = rng.randint(1, 3)
+    body = {
+        'flight_id': rng.choice(ctx['hot_flight_ids']),
+        'passengers': seats,
+        'class': 'economique',
+        'passengers_details': [{'name': f'Passager {i}', 'passport_number': f'B{rng.randint(0, 10 ** 8):08d}'}
+                               for i in range(seats)]
+    }
+    return 'POST /api/reservations', client.post('/api/reservations', json=body, headers=user_headers(ctx, rng))
+
+
+def get_reservations(ctx, client, rng):
+    return 'GET /api/reservations', client.get('/api/reservations', headers=user_headers(ctx, rng))
+
+
+def login(ctx, client, rng):
+    _, username = rng.choice(ctx['users'])
+    return 'POST /api/login', client.post('/api/login', json={'username': username, 'password': ctx['password']})
+
+
+def get_reports(ctx, client, rng):
+    period = rng.choice(['this_month', 'last_3_months', 'this_year', 'all'])
+    return 'GET /api/reports', client.get(f'/api/reports?period={period}', headers=ctx['admin_headers'])
+
+
+def admin_flights(ctx, client, rng):
+    departure, _ = rng.choice(ctx['routes'])
+    return ('GET /api/flights?admin',
+            client.get(f'/api/flights?{urlencode({"departure": departure, "limit": 50})}', headers=ctx['admin_headers']))
+
+
+def get_planes(ctx, client, rng):
+    return 'GET /api/planes', client.get('/api/planes', headers=ctx['admin_headers'])
+
+
+def get_crews(ctx, client, rng):
+    return 'GET /api/crews', client.get('/api/crews', headers=ctx['admin_headers'])
+
+
+def user_headers(ctx, rng):
+    return {'Authorization': f"Bearer {rng.choice(ctx['user_tokens'])}"}
+
+
+# Weighted operation mixes
+WORKLOADS = {
+    'search': [
+        (50, search_flights),
+        (15, search_flights_page),
+        (10, get_flight),
+        (15, get_cities),
+        (10, get_promotions)
+    ],
+    'flash-sale': [
+        (40, create_reservation),
+        (20, get_flight),
+        (15, validate_token),
+        (10, get_promotions),
+        (10, get_reservations),
+        (5, login)
+    ],
+    'admin': [
+        (40, get_reports),
+        (30, admin_flights),
+        (15, get_planes),
+        (15, get_crews)
+    ]
+}
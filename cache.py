@@ -0,0 +1,157 @@
+"""Thread-safe in-process caches used by the Flask API."""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """LRU cache bounded to `maxsize` entries that also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._discard(key)
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._discard(key)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def _store(self, key, value, ttl=None):
+        # Caller holds the lock
+        self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._discard(next(iter(self._data)))
+
+    def _discard(self, key):
+        # Caller holds the lock
+        del self._data[key]
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.stale = False
+
+
+class SingleFlightCache(TTLCache):
+    """TTLCache whose concurrent misses on one key share a single computation.
+
+    `invalidate(predicate)` drops the matching entries and detaches matching
+    computations still in flight: a result read before a write is handed to
+    its waiters but never stored, and later callers start a fresh computation.
+    Entries may carry a `tag`; `invalidate(predicate, tags)` then only looks at
+    the keys filed under those tags instead of the whole cache.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        super().__init__(maxsize, ttl)
+        self._calls = {}  # key -> _Call in flight
+        self._tags = {}  # tag -> keys stored or in flight under it
+        self._key_tags = {}  # key -> tag
+
+    def get_or_compute(self, key, compute, tag=None):
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._key_tags[key] = tag
+                self._tags.setdefault(tag, set()).add(key)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = compute()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                if call.error is None and not call.stale:
+                    self._store(key, call.value)
+                else:
+                    self._untag(key)
+            call.done.set()
+        return call.value
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._data):
+                self._discard(key)
+
+    def invalidate(self, predicate, tags=None):
+        """Drop the entries whose key satisfies `predicate`; return how many were dropped.
+
+        With `tags`, only the keys filed under one of them are considered.
+        """
+        with self._lock:
+            if tags is None:
+                candidates = list(self._data) + list(self._calls)
+            else:
+                candidates = [key for tag in tags for key in self._tags.get(tag, ())]
+        # The predicate runs without the lock: readers are not held up meanwhile
+        keys = [key for key in candidates if predicate(key)]
+        dropped = 0
+        with self._lock:
+            for key in keys:
+                if key in self._data:
+                    self._discard(key)
+                    dropped += 1
+                call = self._calls.pop(key, None)
+                if call is not None:
+                    call.stale = True
+                    self._untag(key)
+        return dropped
+
+    def _discard(self, key):
+        # Caller holds the lock
+        super()._discard(key)
+        self._untag(key)
+
+    def _untag(self, key):
+        # Caller holds the lock; a key stays filed while stored or in flight
+        if key in self._data or key in self._calls or key not in self._key_tags:
+            return
+        tag = self._key_tags.pop(key)
+        keys = self._tags[tag]
+        keys.discard(key)
+        if not keys:
+            del self._tags[tag]
@@ -0,0 +1,26 @@
+"""Gunicorn settings for the Flask API, overridable through the environment.
+
+The app opens its MongoDB client lazily in each worker, so preloading it in
+the master (shared code pages, faster restarts) is safe.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# Threads overlap the MongoDB round trips within a worker. WEB_WORKER_CLASS=gevent
+# (pip install gevent) suits a separate instance serving the seat streams, where
+# each open stream costs a greenlet instead of a thread
+worker_class = os.environ.get('WEB_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('WEB_THREADS', 4))
+worker_connections = int(os.environ.get('WEB_WORKER_CONNECTIONS', 1000))
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+# Async workers monkey-patch the standard library on start: the app must be
+# imported after that, in each worker
+preload_app = worker_class not in ('gevent', 'eventlet')
+# Recycle workers periodically to bound memory growth of the in-process caches
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+accesslog = '-'
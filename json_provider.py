@@ -0,0 +1,42 @@
+"""Flask JSON provider that writes BSON types directly.
+
+ObjectId values become their hex string and datetimes their ISO 8601 form,
+so handlers can return MongoDB documents without rebuilding them. orjson is
+used when installed; otherwise the standard library encoder does the work.
+"""
+import datetime
+
+from bson.objectid import ObjectId
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up, the stdlib encoder is the fallback
+    orjson = None
+
+
+def encode_default(o):
+    if isinstance(o, ObjectId):
+        return str(o)
+    if isinstance(o, (datetime.datetime, datetime.date)):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+class BSONJSONProvider(DefaultJSONProvider):
+    default = staticmethod(encode_default)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            # Non-string keys appear in a few aggregation results
+            return orjson.dumps(obj, default=encode_default, option=orjson.OPT_NON_STR_KEYS).decode()
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        # Encode straight to bytes, skipping the str round trip
+        return self._app.response_class(
+            orjson.dumps(obj, default=encode_default, option=orjson.OPT_NON_STR_KEYS),
+            mimetype=self.mimetype)
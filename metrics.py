@@ -0,0 +1,155 @@
+"""Prometheus-style request and MongoDB metrics for the Flask API.
+
+Counters live in process memory; each worker process exposes its own values
+on /metrics.
+"""
+import threading
+import time
+
+from flask import request
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROUNDTRIP_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+
+# Route of the request being served by this thread, read by the Mongo listener
+_local = threading.local()
+
+
+def current_route():
+    return getattr(_local, 'route', None) or 'none'
+
+
+def _labels(**labels):
+    return ','.join('{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                    for key, value in labels.items())
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.total}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class Metrics:
+    """Per-route request counts, latency histograms and MongoDB usage."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.latency = {}
+        self.roundtrips = {}
+        self.mongo_commands = {}
+        self.mongo_seconds = {}
+        self.mongo_failures = {}
+
+    def init_app(self, app, path='/metrics'):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule(path, 'metrics', self._serve)
+
+    def _before_request(self):
+        _local.route = request.url_rule.rule if request.url_rule else 'unmatched'
+        _local.started = time.perf_counter()
+        _local.mongo_calls = 0
+
+    def _after_request(self, response):
+        started = getattr(_local, 'started', None)
+        if started is not None:
+            self.observe_request(current_route(), request.method, response.status_code,
+                                 time.perf_counter() - started, _local.mongo_calls)
+            _local.started = None
+        return response
+
+    def _serve(self):
+        return self.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+    def observe_request(self, route, method, status, seconds, mongo_calls):
+        with self._lock:
+            key = (route, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            key = (route, method)
+            if key not in self.latency:
+                self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.roundtrips[key] = Histogram(ROUNDTRIP_BUCKETS)
+            self.latency[key].observe(seconds)
+            self.roundtrips[key].observe(mongo_calls)
+
+    def observe_mongo(self, route, command, seconds, failed):
+        _local.mongo_calls = getattr(_local, 'mongo_calls', 0) + 1
+        key = (route, command)
+        with self._lock:
+            self.mongo_commands[key] = self.mongo_commands.get(key, 0) + 1
+            self.mongo_seconds[key] = self.mongo_seconds.get(key, 0.0) + seconds
+            if failed:
+                self.mongo_failures[key] = self.mongo_failures.get(key, 0) + 1
+
+    def render(self):
+        with self._lock:
+            lines = [
+                '# HELP http_requests_total HTTP requests by route, method and status.',
+                '# TYPE http_requests_total counter'
+            ]
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{{_labels(route=route, method=method, status=status)}}} {count}')
+
+            lines += [
+                '# HELP http_request_duration_seconds Request latency by route.',
+                '# TYPE http_request_duration_seconds histogram'
+            ]
+            for (route, method), histogram in sorted(self.latency.items()):
+                lines += histogram.render('http_request_duration_seconds', _labels(route=route, method=method))
+
+            lines += [
+                '# HELP mongo_roundtrips_per_request MongoDB commands issued per request.',
+                '# TYPE mongo_roundtrips_per_request histogram'
+            ]
+            for (route, method), histogram in sorted(self.roundtrips.items()):
+                lines += histogram.render('mongo_roundtrips_per_request', _labels(route=route, method=method))
+
+            for name, kind, help_text, values in (
+                ('mongo_commands_total', 'counter', 'MongoDB commands by route and command.', self.mongo_commands),
+                ('mongo_command_seconds_total', 'counter', 'Time spent in MongoDB commands.', self.mongo_seconds),
+                ('mongo_command_failures_total', 'counter', 'Failed MongoDB commands.', self.mongo_failures),
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+                for (route, command), value in sorted(values.items()):
+                    lines.append(f'{name}{{{_labels(route=route, command=command)}}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """pymongo listener feeding Metrics; runs in the thread that issued the command."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.metrics.observe_mongo(current_route(), event.command_name, event.duration_micros / 1e6, False)
+
+    def failed(self, event):
+        self.metrics.observe_mongo(current_route(), event.command_name, event.duration_micros / 1e6, True)
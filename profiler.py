@@ -0,0 +1,155 @@
+"""Slow MongoDB query log with automatic explain-plan capture.
+
+A pymongo CommandListener times every find/aggregate/count command. Commands
+slower than the threshold are handed to a background thread that runs
+`explain` (queryPlanner verbosity, nothing is executed) and records the
+calling route, the filter shape with literal values redacted, and the
+winning plan stages, flagging collection scans.
+"""
+import collections
+import datetime
+import logging
+import os
+import queue
+import threading
+
+from pymongo import monitoring
+
+from metrics import current_route
+
+logger = logging.getLogger('slow_queries')
+
+PROFILED_COMMANDS = {'find', 'aggregate', 'count'}
+# Wire-protocol fields that explain rejects or that are not part of the query
+IGNORED_FIELDS = {'lsid', 'txnNumber', 'autocommit', 'startTransaction', 'readConcern', 'writeConcern'}
+
+
+def redact(value):
+    """Keep operators, field names and $field paths; replace literals by their type."""
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    if isinstance(value, str) and value.startswith('$'):
+        return value
+    return f'<{type(value).__name__}>'
+
+
+def query_shape(command_name, command):
+    if command_name == 'find':
+        return {'filter': redact(command.get('filter', {})), 'sort': command.get('sort')}
+    if command_name == 'aggregate':
+        return {'pipeline': redact(command.get('pipeline', []))}
+    return {'query': redact(command.get('query', {}))}
+
+
+def winning_plan_stages(explain):
+    """Stage names of every winning plan found in an explain document, outermost first."""
+    stages = []
+
+    def walk_plan(node):
+        if isinstance(node, dict):
+            if 'stage' in node:
+                stages.append(node['stage'])
+            for key, item in node.items():
+                if key != 'stage':
+                    walk_plan(item)
+        elif isinstance(node, list):
+            for item in node:
+                walk_plan(item)
+
+    def find_plans(node):
+        if isinstance(node, dict):
+            for key, item in node.items():
+                if key == 'winningPlan':
+                    walk_plan(item)
+                else:
+                    find_plans(item)
+        elif isinstance(node, list):
+            for item in node:
+                find_plans(item)
+
+    find_plans(explain)
+    return stages
+
+
+class SlowQueryProfiler(monitoring.CommandListener):
+    def __init__(self, threshold_ms=100, capacity=200, explain=True):
+        self.threshold_micros = threshold_ms * 1000
+        self.explain = explain
+        self.entries = collections.deque(maxlen=capacity)
+        self._client_factory = None
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=100)
+        self._worker = None
+        self._worker_pid = None
+
+    def bind(self, client_factory):
+        """Callable returning the MongoClient used to run the explain commands."""
+        self._client_factory = client_factory
+
+    def started(self, event):
+        if event.command_name in PROFILED_COMMANDS:
+            with self._lock:
+                self._pending[(event.connection_id, event.request_id)] = (
+                    event.database_name, event.command, current_route())
+
+    def succeeded(self, event):
+        self._finished(event)
+
+    def failed(self, event):
+        self._finished(event)
+
+    def _finished(self, event):
+        if event.command_name not in PROFILED_COMMANDS:
+            return
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None or event.duration_micros < self.threshold_micros:
+            return
+        database, command, route = pending
+        entry = {
+            'time': datetime.datetime.utcnow().isoformat(),
+            'route': route,
+            'command': event.command_name,
+            'collection': command.get(event.command_name),
+            'duration_ms': round(event.duration_micros / 1000, 1),
+            'shape': query_shape(event.command_name, command),
+            'plan': None,
+            'collscan': None
+        }
+        try:
+            self._ensure_worker()
+            self._queue.put_nowait((database, event.command_name, command, entry))
+        except queue.Full:
+            self._record(entry)  # Keep the timing even if explain is backlogged
+
+    def _ensure_worker(self):
+        # One explain thread per process, restarted after a fork
+        if self._worker is None or self._worker_pid != os.getpid() or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or self._worker_pid != os.getpid() or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name='slow-query-explain', daemon=True)
+                    self._worker_pid = os.getpid()
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            database, command_name, command, entry = self._queue.get()
+            if self.explain and self._client_factory is not None:
+                try:
+                    explained = {key: value for key, value in command.items()
+                                 if not key.startswith('$') and key not in IGNORED_FIELDS}
+                    result = self._client_factory()[database].command({'explain': explained, 'verbosity': 'queryPlanner'})
+                    entry['plan'] = winning_plan_stages(result)
+                    entry['collscan'] = 'COLLSCAN' in entry['plan']
+                except Exception as e:
+                    entry['plan'] = f'explain failed: {e}'
+            self._record(entry)
+
+    def _record(self, entry):
+        self.entries.append(entry)
+        logger.warning('Slow %s on %s from %s: %.1f ms%s shape=%s plan=%s',
+                       entry['command'], entry['collection'], entry['route'], entry['duration_ms'],
+                       ' [COLLSCAN]' if entry['collscan'] else '', entry['shape'], entry['plan'])
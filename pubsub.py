@@ -0,0 +1,148 @@
+"""In-process publish/subscribe with per-subscriber burst coalescing.
+
+Publishers call `publish(key, message)`; every subscription watching `key`
+keeps only the latest undelivered message per key, so a burst of writes on
+one flight reaches each watcher as a single update. `PubSub` only fans out
+within the process; `PollingFeed` feeds it with the state of the watched keys
+read from the database, so writes made by any process reach every watcher.
+"""
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, broker, keys, coalesce):
+        self.keys = frozenset(keys)
+        self.coalesce = coalesce
+        self._broker = broker
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._ready = threading.Event()
+
+    def push(self, key, message):
+        with self._lock:
+            self._pending[key] = message  # A newer state replaces an undelivered one
+            self._ready.set()
+
+    def drain(self, timeout):
+        """Wait up to `timeout` seconds for messages, then linger `coalesce` seconds to batch a burst."""
+        if not self._ready.wait(timeout):
+            return {}
+        if self.coalesce:
+            time.sleep(self.coalesce)
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._ready.clear()
+        return pending
+
+    def close(self):
+        self._broker.unsubscribe(self)
+
+
+class PubSub:
+    def __init__(self, coalesce=0.2):
+        self.coalesce = coalesce
+        self._lock = threading.Lock()
+        self._subscribers = {}  # key -> set of subscriptions
+        self._subscriptions = set()
+
+    def subscribe(self, keys):
+        subscription = Subscription(self, keys, self.coalesce)
+        with self._lock:
+            self._subscriptions.add(subscription)
+            for key in subscription.keys:
+                self._subscribers.setdefault(key, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription not in self._subscriptions:
+                return
+            self._subscriptions.discard(subscription)
+            for key in subscription.keys:
+                watchers = self._subscribers[key]
+                watchers.discard(subscription)
+                if not watchers:
+                    del self._subscribers[key]
+
+    def watching(self, key):
+        with self._lock:
+            return key in self._subscribers
+
+    def keys(self):
+        """Keys with at least one subscription."""
+        with self._lock:
+            return list(self._subscribers)
+
+    def publish(self, key, message):
+        with self._lock:
+            watchers = list(self._subscribers.get(key, ()))
+        for subscription in watchers:
+            subscription.push(key, message)
+        return len(watchers)
+
+    def __len__(self):
+        """Number of open subscriptions."""
+        return len(self._subscriptions)
+
+
+class PollingFeed:
+    """Publish into `broker` every change of the watched keys' state.
+
+    A background thread calls `fetch(keys)`, returning {key: state}, every
+    `interval` seconds for all keys watched in this process: one read serves
+    every subscriber, whatever process made the write. Writes seen locally can
+    be passed to `observe` to reach subscribers without waiting for the poll.
+    """
+
+    def __init__(self, broker, fetch, interval=1.0):
+        self.broker = broker
+        self.fetch = fetch
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._last = {}  # key -> last published state
+        self._thread_pid = None
+
+    def remember(self, states):
+        """Record states a subscriber already has (e.g. its initial snapshot)."""
+        with self._lock:
+            for key, state in states.items():
+                self._last.setdefault(key, state)
+
+    def observe(self, key, state):
+        """Publish `state` unless it is unchanged or nobody watches `key`."""
+        if not self.broker.watching(key):
+            return
+        with self._lock:
+            if self._last.get(key) == state:
+                return
+            self._last[key] = state
+        self.broker.publish(key, state)
+
+    def ensure_started(self):
+        # Started lazily in each process: a thread does not survive a fork
+        with self._lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._thread_pid = os.getpid()
+        threading.Thread(target=self._run, name='polling-feed', daemon=True).start()
+
+    def poll(self):
+        keys = self.broker.keys()
+        with self._lock:
+            self._last = {key: state for key, state in self._last.items() if key in keys}
+        if keys:
+            for key, state in self.fetch(keys).items():
+                self.observe(key, state)
+
+    def _run(self):
+        while True:
+            try:
+                self.poll()
+            except Exception:
+                logger.exception('Polling feed failed, retrying in %ss', self.interval)
+            time.sleep(self.interval)
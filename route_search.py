@@ -0,0 +1,165 @@
+"""In-memory flight graph for multi-leg itinerary search.
+
+Flights are bucketed by departure city and kept sorted by schedule, so the
+legs that can follow an arrival are found by bisection over the connection
+window instead of a query per hop. The graph is loaded once per process,
+reloaded after a TTL (to pick up other workers' writes) and patched in place
+from the (before, after) flight changes of every write in this process.
+"""
+import bisect
+import datetime
+import heapq
+import threading
+import time
+
+SORT_KEYS = ('price', 'duration')
+
+
+def make_leg(flight):
+    """Compact search view of a flight document, or None if it cannot be scheduled."""
+    schedule = flight.get('schedule')
+    if not isinstance(schedule, datetime.datetime) or not flight.get('departure') or not flight.get('arrival'):
+        return None  # Legacy string schedules are left out until migrated
+    try:
+        duration = float(flight.get('duration') or 0)
+        seats = int(flight.get('capacity') or 0) - int(flight.get('passengers') or 0)
+        price = float(flight.get('price_numeric') or 0)
+        arrival_time = schedule + datetime.timedelta(hours=duration)
+    except (TypeError, ValueError, OverflowError):
+        return None  # e.g. a legacy '2h 30m' duration: one bad flight must not break every search
+    return {
+        '_id': str(flight['_id']),
+        'number': flight.get('number'),
+        'departure': flight['departure'],
+        'arrival': flight['arrival'],
+        'schedule': schedule,
+        'arrival_time': arrival_time,
+        'duration': duration,
+        'price_numeric': price,
+        'seats': seats,
+        'company': flight.get('company'),
+        'class': flight.get('class')
+    }
+
+
+class RouteGraph:
+    def __init__(self, ttl=300, max_expansions=20000):
+        self.ttl = ttl
+        self.max_expansions = max_expansions
+        self._lock = threading.RLock()
+        self._departures = {}  # city -> sorted [(schedule, flight id)]
+        self._legs = {}  # flight id -> leg
+        self._loaded_at = None
+
+    def ensure_loaded(self, loader):
+        """(Re)build the graph from `loader()`, an iterable of flights, when missing or stale."""
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return
+            self._departures = {}
+            self._legs = {}
+            for flight in loader():
+                self._add(flight)
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def apply(self, changes):
+        """Patch the graph with (before, after) flight documents."""
+        with self._lock:
+            if self._loaded_at is None:
+                return  # The next search loads the current state anyway
+            for before, after in changes:
+                if before and '_id' in before:
+                    self._remove(str(before['_id']))
+                if after and '_id' in after:
+                    self._remove(str(after['_id']))
+                    self._add(after)
+
+    def __len__(self):
+        return len(self._legs)
+
+    def _add(self, flight):
+        leg = make_leg(flight)
+        if leg is None:
+            return
+        self._legs[leg['_id']] = leg
+        bisect.insort(self._departures.setdefault(leg['departure'], []), (leg['schedule'], leg['_id']))
+
+    def _remove(self, flight_id):
+        leg = self._legs.pop(flight_id, None)
+        if leg is None:
+            return
+        keys = self._departures[leg['departure']]
+        index = bisect.bisect_left(keys, (leg['schedule'], flight_id))
+        if index < len(keys) and keys[index] == (leg['schedule'], flight_id):
+            del keys[index]
+
+    def _window(self, city, earliest, latest):
+        """Legs leaving `city` between `earliest` and `latest`, in schedule order."""
+        keys = self._departures.get(city)
+        if not keys:
+            return
+        for index in range(bisect.bisect_left(keys, (earliest,)), len(keys)):
+            schedule, flight_id = keys[index]
+            if schedule > latest:
+                return
+            yield self._legs[flight_id]
+
+    def search(self, departure, arrival, start, end, passengers=1, max_connections=1,
+               min_connection=datetime.timedelta(minutes=45), max_connection=datetime.timedelta(hours=6),
+               sort='price', limit=20):
+        """Best itineraries from `departure` to `arrival` whose first leg leaves in [start, end).
+
+        The depth-first walk stops after `max_expansions` candidate legs, so a
+        dense graph degrades into partial results rather than a slow request.
+        """
+        found = []
+        expansions = 0
+
+        def extend(path, visited):
+            nonlocal expansions
+            last = path[-1]
+            if last['arrival'] == arrival:
+                found.append(path)
+                return
+            if len(path) > max_connections:
+                return
+            final_hop = len(path) == max_connections
+            for leg in self._window(last['arrival'], last['arrival_time'] + min_connection,
+                                    last['arrival_time'] + max_connection):
+                if expansions >= self.max_expansions:
+                    return
+                expansions += 1
+                if leg['seats'] < passengers or leg['arrival'] in visited:
+                    continue
+                if final_hop and leg['arrival'] != arrival:
+                    continue
+                extend(path + [leg], visited | {leg['arrival']})
+
+        with self._lock:
+            for leg in self._window(departure, start, end):
+                if leg['schedule'] >= end or expansions >= self.max_expansions:
+                    break
+                expansions += 1
+                if leg['seats'] >= passengers and leg['arrival'] != departure:
+                    extend([leg], {departure, leg['arrival']})
+
+        def total_price(path):
+            return sum(leg['price_numeric'] for leg in path)
+
+        def total_hours(path):
+            return (path[-1]['arrival_time'] - path[0]['schedule']).total_seconds() / 3600
+
+        key = ((lambda p: (total_price(p), total_hours(p))) if sort == 'price'
+               else (lambda p: (total_hours(p), total_price(p))))
+        return [{
+            'legs': path,
+            'connections': len(path) - 1,
+            'departure_time': path[0]['schedule'],
+            'arrival_time': path[-1]['arrival_time'],
+            'total_price': total_price(path),
+            'total_duration': round(total_hours(path), 2)
+        } for path in heapq.nsmallest(limit, found, key=key)]
@@ -0,0 +1,121 @@
+"""Per-plane and per-crew flight intervals for double-booking checks.
+
+For every (field, resource) pair, e.g. ('plane', 'ts-ima'), the index keeps
+the [departure, arrival) intervals of its flights sorted by start. An overlap
+check bisects to the first interval starting after the window and walks back
+only as far as the longest interval of that resource, so it costs O(log n)
+plus the few neighbours it has to compare. Like the route graph it is loaded
+lazily per process, reloaded after a TTL and patched from flight writes.
+"""
+import bisect
+import datetime
+import threading
+import time
+
+from autocomplete import normalize_key
+
+# A flight without a duration still holds its plane and crew at departure
+MIN_INTERVAL = datetime.timedelta(minutes=1)
+
+
+def flight_interval(flight):
+    """(start, end) of a flight, or None when its schedule or duration cannot be read."""
+    schedule = flight.get('schedule')
+    if not isinstance(schedule, datetime.datetime):
+        return None
+    try:
+        duration = datetime.timedelta(hours=float(flight.get('duration') or 0))
+        return schedule, schedule + max(duration, MIN_INTERVAL)
+    except (TypeError, ValueError, OverflowError):
+        return None  # e.g. a legacy '2h 30m' duration
+
+
+class ScheduleIndex:
+    def __init__(self, fields=('plane', 'crew'), ttl=300):
+        self.fields = fields
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._intervals = {}  # (field, key) -> sorted [(start, end, flight id)]
+        self._longest = {}  # (field, key) -> longest interval, bounds the backward walk
+        self._flights = {}  # flight id -> {'number', 'start', 'end', field: value}
+        self._loaded_at = None
+
+    def ensure_loaded(self, loader):
+        """(Re)build from `loader()`, an iterable of flights, when missing or stale."""
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return
+            self._intervals = {}
+            self._longest = {}
+            self._flights = {}
+            for flight in loader():
+                self._add(flight)
+            self._loaded_at = time.monotonic()
+
+    def apply(self, changes):
+        """Patch the index with (before, after) flight documents."""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            for before, after in changes:
+                if before and after and all(before.get(f) == after.get(f) for f in self.fields + ('schedule', 'duration')):
+                    continue  # Seat holds and other edits that do not move the flight
+                for flight in (before, after):
+                    if flight and '_id' in flight:
+                        self._remove(str(flight['_id']))
+                if after and '_id' in after:
+                    self._add(after)
+
+    def overlapping(self, field, value, start, end, exclude=None):
+        """Flights holding `value` (a plane or crew) for part of [start, end), except `exclude`."""
+        key = (field, normalize_key(value))
+        with self._lock:
+            items = self._intervals.get(key)
+            if not items:
+                return []
+            earliest = start - self._longest[key]
+            conflicts = []
+            # Intervals before this index start before the window ends
+            for index in range(bisect.bisect_left(items, (end,)) - 1, -1, -1):
+                item_start, item_end, flight_id = items[index]
+                if item_start <= earliest:
+                    break  # Even the longest interval starting here ends before the window
+                if item_end > start and flight_id != exclude:
+                    flight = self._flights[flight_id]
+                    conflicts.append({
+                        '_id': flight_id,
+                        'number': flight['number'],
+                        'field': field,
+                        'resource': flight[field],
+                        'start': item_start,
+                        'end': item_end
+                    })
+            return conflicts[::-1]
+
+    def _add(self, flight):
+        interval = flight_interval(flight)
+        if interval is None:
+            return
+        flight_id = str(flight['_id'])
+        entry = {'number': flight.get('number'), 'start': interval[0], 'end': interval[1]}
+        for field in self.fields:
+            if not flight.get(field):
+                continue
+            key = (field, normalize_key(flight[field]))
+            entry[field] = flight[field]
+            bisect.insort(self._intervals.setdefault(key, []), (interval[0], interval[1], flight_id))
+            self._longest[key] = max(self._longest.get(key, MIN_INTERVAL), interval[1] - interval[0])
+        self._flights[flight_id] = entry
+
+    def _remove(self, flight_id):
+        entry = self._flights.pop(flight_id, None)
+        if entry is None:
+            return
+        item = (entry['start'], entry['end'], flight_id)
+        for field in self.fields:
+            if field not in entry:
+                continue
+            items = self._intervals[(field, normalize_key(entry[field]))]
+            index = bisect.bisect_left(items, item)
+            if index < len(items) and items[index] == item:
+                del items[index]
@@ -29,6 +29,17 @@ interface Reservation {
   updated_at?: string;
 }
 
+interface BookingContext {
+  success: boolean;
+  user: any;
+  flight: any;
+  seats_left: number;
+  promotion: Promotion | null;
+  unit_price: number;
+  reservations: Reservation[];
+  message?: string;
+}
+
 @Component({
   selector: 'app-booking-form',
   templateUrl: './booking-form.component.html',
@@ -44,6 +55,8 @@ export class BookingFormComponent implements OnInit {
     class: 'economique'
   };
   user: any = null;
+  seatsLeft: number | null = null;
+  unitPrice: number | null = null;
   isEditing = false;
   private apiUrl = 'http://localhost:5000/api';
 
@@ -55,9 +68,53 @@ export class BookingFormComponent implements OnInit {
 
   ngOnInit(): void {
     this.loadPromotions();
-    this.checkUser();
     this.checkFlightFromState();
-    this.checkReservationFromQuery();
+    this.route.queryParams.subscribe(params => {
+      if (params['reservationId']) {
+        this.isEditing = true;
+        this.loadBookingContext({ reservation_id: params['reservationId'] });
+      } else if (this.selectedFlight) {
+        this.loadBookingContext({ flight_id: this.selectedFlight._id });
+      } else {
+        this.checkUser();
+      }
+    });
+  }
+
+  // One request for the user, the flight with its price and seats, and the user's reservations on it
+  loadBookingContext(params: { flight_id?: string; reservation_id?: string }): void {
+    const token = localStorage.getItem('token');
+    if (!token) {
+      return;
+    }
+    this.http.get<BookingContext>(`${this.apiUrl}/booking-context`, {
+      headers: { Authorization: `Bearer ${token}` },
+      params
+    }).subscribe({
+      next: (response) => {
+        this.user = response.user;
+        this.selectedFlight = response.flight;
+        this.seatsLeft = response.seats_left;
+        this.unitPrice = response.unit_price;
+        if (params.reservation_id) {
+          const reservation = response.reservations.find(r => r._id === params.reservation_id);
+          if (reservation) {
+            this.reservation = { ...reservation };
+          }
+        }
+      },
+      error: (error) => {
+        if (error.status === 401) {
+          localStorage.removeItem('token');
+          this.user = null;
+          return;
+        }
+        alert('Erreur lors du chargement de la réservation: ' + (error.error?.message || 'Erreur serveur'));
+        if (params.reservation_id) {
+          this.router.navigate(['/booking']);
+        }
+      }
+    });
   }
 
   checkUser(): void {
@@ -94,51 +151,6 @@ export class BookingFormComponent implements OnInit {
     }
   }
 
-  checkReservationFromQuery(): void {
-    this.route.queryParams.subscribe(params => {
-      if (params['reservationId']) {
-        this.isEditing = true;
-        this.http.get<{ success: boolean; reservations: Reservation[]; message?: string }>(`${this.apiUrl}/reservations`, {
-          headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
-        }).subscribe({
-          next: (response) => {
-            if (response.success) {
-              const reservation = response.reservations.find(r => r._id === params['reservationId']);
-              if (reservation) {
-                this.reservation = { ...reservation };
-                this.loadFlightDetails(reservation.flight_id);
-              } else {
-                alert('Réservation non trouvée.');
-                this.router.navigate(['/booking']);
-              }
-            } else {
-              alert(response.message || 'Erreur lors du chargement de la réservation.');
-            }
-          },
-          error: (error) => {
-            alert('Erreur lors du chargement de la réservation: ' + (error.error?.message || 'Erreur serveur'));
-          }
-        });
-      }
-    });
-  }
-
-  loadFlightDetails(flightId: string): void {
-    this.http.get<{ success: boolean; flights: any[]; message?: string }>(`${this.apiUrl}/flights?flight_id=${flightId}`)
-      .subscribe({
-        next: (response) => {
-          if (response.success && response.flights.length > 0) {
-            this.selectedFlight = response.flights[0];
-          } else {
-            alert(response.message || 'Vol non trouvé.');
-          }
-        },
-        error: (error) => {
-          alert('Erreur lors du chargement des détails du vol: ' + (error.error?.message || 'Erreur serveur'));
-        }
-      });
-  }
-
   loadPromotions(): void {
     this.http.get<{ success: boolean; promotions: Promotion[]; message?: string }>(`${this.apiUrl}/promotions`)
       .subscribe({
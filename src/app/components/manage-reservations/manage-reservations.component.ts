@@ -17,6 +17,7 @@ interface Reservation {
   status: string;
   created_at: string;
   updated_at: string;
+  flight?: any;
 }
 
 @Component({
@@ -26,6 +27,7 @@ interface Reservation {
 })
 export class ManageReservationsComponent implements OnInit {
   reservations: Reservation[] = [];  // For list view
+  nextCursor: string | null = null;
   reservation: Reservation | null = null;  // For single view
   flight: any = null;
   user: any = null;
@@ -84,20 +86,16 @@ export class ManageReservationsComponent implements OnInit {
   loadReservations(): void {
     const reservationId = this.route.snapshot.paramMap.get('id');
     if (reservationId) {
-      this.http.get<{ success: boolean; reservations: Reservation[]; message?: string }>(`${this.apiUrl}/reservations`, {
-        headers: this.getHeaders()
+      // The reservation and its flight in one request
+      this.http.get<{ success: boolean; flight: any; reservations: Reservation[]; message?: string }>(`${this.apiUrl}/booking-context`, {
+        headers: this.getHeaders(),
+        params: { reservation_id: reservationId }
       }).subscribe({
         next: (response) => {
-          if (response.success) {
-            this.reservation = response.reservations.find(r => r._id === reservationId) || null;
-            if (this.reservation) {
-              this.loadFlightDetails(this.reservation.flight_id);
-            } else {
-              alert('Réservation non trouvée.');
-              this.router.navigate(['/user/dashboard']);
-            }
-          } else {
-            alert(response.message || 'Erreur lors du chargement de la réservation.');
+          this.reservation = response.reservations.find(r => r._id === reservationId) || null;
+          this.flight = response.flight;
+          if (!this.reservation) {
+            alert('Réservation non trouvée.');
             this.router.navigate(['/user/dashboard']);
           }
         },
@@ -107,37 +105,32 @@ export class ManageReservationsComponent implements OnInit {
         }
       });
     } else {
-      this.http.get<{ success: boolean; reservations: Reservation[]; message?: string }>(`${this.apiUrl}/reservations`, {
-        headers: this.getHeaders()
-      }).subscribe({
-        next: (response) => {
-          if (response.success) {
-            this.reservations = response.reservations;
-          } else {
-            alert(response.message || 'Erreur lors du chargement des réservations.');
-          }
-        },
-        error: (error) => {
-          alert('Erreur lors du chargement des réservations: ' + (error.error?.message || 'Erreur serveur'));
-        }
-      });
+      this.loadMoreReservations();
     }
   }
 
-  loadFlightDetails(flightId: string): void {
-    this.http.get<{ success: boolean; flights: any[]; message?: string }>(`${this.apiUrl}/flights?flight_id=${flightId}`)
-      .subscribe({
-        next: (response) => {
-          if (response.success && response.flights.length > 0) {
-            this.flight = response.flights[0];
-          } else {
-            alert(response.message || 'Vol non trouvé.');
-          }
-        },
-        error: (error) => {
-          alert('Erreur lors du chargement des détails du vol: ' + (error.error?.message || 'Erreur serveur'));
+  // Newest first, one page at a time; each reservation comes with its flight summary
+  loadMoreReservations(): void {
+    const params: { [param: string]: string } = { limit: '20' };
+    if (this.nextCursor) {
+      params['cursor'] = this.nextCursor;
+    }
+    this.http.get<{ success: boolean; reservations: Reservation[]; next_cursor: string | null; message?: string }>(`${this.apiUrl}/reservations`, {
+      headers: this.getHeaders(),
+      params
+    }).subscribe({
+      next: (response) => {
+        if (response.success) {
+          this.reservations = [...this.reservations, ...response.reservations];
+          this.nextCursor = response.next_cursor;
+        } else {
+          alert(response.message || 'Erreur lors du chargement des réservations.');
         }
-      });
+      },
+      error: (error) => {
+        alert('Erreur lors du chargement des réservations: ' + (error.error?.message || 'Erreur serveur'));
+      }
+    });
   }
 
   addPassenger(): void {
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import mongomock
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as backend
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """A fresh in-memory database behind the app's lazy collections."""
+    database = mongomock.MongoClient()['tunisair_test']
+    monkeypatch.setattr(backend, 'get_db', lambda: database)
+    monkeypatch.setattr(backend, 'mongo_client_pid', None)  # Never reuse a cached real collection
+    return database
@@ -0,0 +1,28 @@
+import datetime
+
+import pytest
+
+import app as backend
+
+PAYLOAD = {'number': 'TU1', 'departure': 'Tunis', 'arrival': 'Paris', 'plane': 'TS-IMA', 'crew': 'Équipage 1',
+           'schedule': '2025-06-01T10:30', 'price': '150 €', 'status': "A l'heure"}
+
+
+def test_numbers_are_parsed():
+    flight = backend.build_flight(dict(PAYLOAD, capacity='180', passengers=3, duration='2.5'))
+    assert (flight['capacity'], flight['passengers'], flight['duration']) == (180, 3, 2.5)
+    assert flight['schedule'] == datetime.datetime(2025, 6, 1, 10, 30)
+
+
+def test_defaults_to_zero():
+    flight = backend.build_flight(PAYLOAD)
+    assert (flight['capacity'], flight['passengers'], flight['duration']) == (0, 0, 0)
+
+
+@pytest.mark.parametrize('field, value', [
+    ('duration', '2h 30m'), ('duration', -1), ('duration', 'nan'), ('duration', True),
+    ('capacity', 'beaucoup'), ('capacity', 1.5), ('passengers', None), ('passengers', -2),
+])
+def test_invalid_numbers_are_rejected(field, value):
+    with pytest.raises(ValueError, match=f'Valeur numérique invalide pour {field}'):
+        backend.build_flight(dict(PAYLOAD, **{field: value}))
@@ -0,0 +1,118 @@
+import threading
+import time
+
+import pytest
+
+from cache import SingleFlightCache, TTLCache
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=0)
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+
+def start_slow_call(cache, key, value, release):
+    """Begin a computation of `key` that blocks until `release` is set."""
+    started = threading.Event()
+    results = []
+
+    def compute():
+        started.set()
+        release.wait(5)
+        return value
+
+    thread = threading.Thread(target=lambda: results.append(cache.get_or_compute(key, compute)))
+    thread.start()
+    started.wait(5)
+    return thread, results
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = SingleFlightCache(ttl=60)
+    release = threading.Event()
+    leader, leader_results = start_slow_call(cache, 'k', 'value', release)
+    calls = []
+    results = []
+    waiters = [threading.Thread(target=lambda: results.append(
+        cache.get_or_compute('k', lambda: calls.append(1) or 'other'))) for _ in range(5)]
+    for waiter in waiters:
+        waiter.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in [leader] + waiters:
+        thread.join(5)
+    assert calls == []
+    assert leader_results + results == ['value'] * 6
+    assert cache.get('k') == 'value'
+
+
+def test_invalidated_call_is_not_stored():
+    cache = SingleFlightCache(ttl=60)
+    release = threading.Event()
+    leader, results = start_slow_call(cache, 'k', 'before write', release)
+    cache.invalidate(lambda key: key == 'k')
+    release.set()
+    leader.join(5)
+    assert results == ['before write']
+    assert cache.get('k') is None
+
+
+def test_invalidate_only_drops_matching_keys():
+    cache = SingleFlightCache(ttl=60)
+    for key in ('tunis', 'paris', 'rome'):
+        cache.get_or_compute(key, lambda: key)
+    assert cache.invalidate(lambda key: key != 'rome') == 2
+    assert cache.get('rome') == 'rome' and cache.get('tunis') is None
+
+
+def test_failed_computation_reaches_waiters_and_is_not_cached():
+    cache = SingleFlightCache(ttl=60)
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute('k', lambda: (_ for _ in ()).throw(RuntimeError('down')))
+    assert cache.get_or_compute('k', lambda: 'recovered') == 'recovered'
+
+
+def test_caller_after_invalidation_starts_a_fresh_computation():
+    cache = SingleFlightCache(ttl=60)
+    release = threading.Event()
+    leader, results = start_slow_call(cache, 'k', 'before write', release)
+    cache.invalidate(lambda key: key == 'k')
+    assert cache.get_or_compute('k', lambda: 'after write') == 'after write'
+    release.set()
+    leader.join(5)
+    assert results == ['before write']
+    assert cache.get('k') == 'after write'
+
+
+def test_invalidate_by_tag_only_looks_at_tagged_keys():
+    cache = SingleFlightCache(ttl=60)
+    cache.get_or_compute('tunis-paris', lambda: 1, tag=('Tunis', 'Paris'))
+    cache.get_or_compute('tunis-rome', lambda: 2, tag=('Tunis', 'Rome'))
+    cache.get_or_compute('any', lambda: 3)
+    seen = []
+    assert cache.invalidate(lambda key: seen.append(key) or True, tags=[('Tunis', 'Paris'), None]) == 2
+    assert sorted(seen) == ['any', 'tunis-paris']
+    assert cache.get('tunis-rome') == 2
+    assert cache.invalidate(lambda key: True, tags=[('Tunis', 'Paris')]) == 0
+
+
+def test_evicted_keys_leave_the_tag_index():
+    cache = SingleFlightCache(maxsize=1, ttl=60)
+    cache.get_or_compute('a', lambda: 1, tag='t')
+    cache.get_or_compute('b', lambda: 2, tag='t')
+    assert cache._tags == {'t': {'b'}}
+    cache.clear()
+    assert cache._tags == {} and cache._key_tags == {}
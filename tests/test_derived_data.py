@@ -0,0 +1,50 @@
+import pytest
+
+import app as backend
+
+
+@pytest.fixture
+def fresh_process(db, monkeypatch):
+    monkeypatch.setattr(backend, 'built_data', set())
+    return db
+
+
+def test_build_runs_once_per_database(fresh_process, monkeypatch):
+    builds = []
+    backend.ensure_built('rollup', lambda: builds.append(1))
+    backend.ensure_built('rollup', lambda: builds.append(1))
+    assert builds == [1]
+    monkeypatch.setattr(backend, 'built_data', set())  # Another worker, same database
+    backend.ensure_built('rollup', lambda: builds.append(1))
+    assert builds == [1]
+
+
+def test_partial_collection_is_still_built(fresh_process):
+    # An incremental write before the first build must not count as a build
+    fresh_process.cities.insert_one({'kind': 'departure', 'name': 'Tunis', 'flights': 1})
+    builds = []
+    backend.ensure_built('cities', lambda: builds.append(1))
+    assert builds == [1]
+
+
+def test_failed_build_is_retried(fresh_process):
+    with pytest.raises(RuntimeError):
+        backend.ensure_built('rollup', lambda: (_ for _ in ()).throw(RuntimeError('down')))
+    builds = []
+    backend.ensure_built('rollup', lambda: builds.append(1))
+    assert builds == [1]
+
+
+def test_flight_write_only_drops_searches_of_its_route(monkeypatch):
+    cache = backend.SingleFlightCache(ttl=60)
+    monkeypatch.setattr(backend, 'flight_search_cache', cache)
+    searches = {'tunis': {'departure': 'Tunis'}, 'tunis-paris': {'departure': 'Tunis', 'arrival': 'Paris'},
+                'tunis-rome': {'departure': 'Tunis', 'arrival': 'Rome'}, 'rome': {'departure': 'Rome'},
+                'all': {}}
+    for name, criteria in searches.items():
+        key = (tuple(sorted(criteria.items())), None, False, None)
+        cache.get_or_compute(key, lambda: name, backend.flight_search_tag(criteria))
+    flight = {'departure': 'Tunis', 'arrival': 'Paris', 'passengers': 1}
+    backend.invalidate_flight_searches([(flight, dict(flight, passengers=2))])
+    remaining = sorted(cache.get(key) for key in list(cache._data))
+    assert remaining == ['rome', 'tunis-rome']
@@ -0,0 +1,65 @@
+import pytest
+from pymongo import ASCENDING, DESCENDING
+
+import app as backend
+
+
+@pytest.fixture
+def rows(db):
+    # Few distinct sort values, so pages have to split runs of ties on _id
+    db.rows.insert_many([{'created_at': f'2025-01-0{i % 3 + 1}T00:00:00', 'n': i} for i in range(25)])
+    return db.rows
+
+
+def read_all(collection, direction, limit):
+    seen, cursor = [], None
+    while True:
+        page, cursor = backend.keyset_page(collection, {}, 'created_at', limit, cursor, direction=direction)
+        assert len(page) <= limit
+        seen += page
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize('direction', [ASCENDING, DESCENDING])
+@pytest.mark.parametrize('limit', [1, 4, 25, 50])
+def test_keyset_pages_have_no_duplicates_or_gaps(rows, direction, limit):
+    expected = list(rows.find({}).sort([('created_at', direction), ('_id', direction)]))
+    assert [row['_id'] for row in read_all(rows, direction, limit)] == [row['_id'] for row in expected]
+
+
+def test_keyset_page_applies_the_query(rows):
+    page, cursor = backend.keyset_page(rows, {'created_at': '2025-01-02T00:00:00'}, 'created_at', 100)
+    assert cursor is None
+    assert len(page) == 8 and all(row['n'] % 3 == 1 for row in page)
+
+
+def test_cursor_round_trip():
+    last_id = backend.ObjectId()
+    assert backend.decode_cursor(backend.encode_cursor('2025-01-01T00:00:00', last_id)) == ('2025-01-01T00:00:00', last_id)
+
+
+@pytest.mark.parametrize('token', ['', 'not-a-cursor', 'e30'])
+def test_decode_cursor_rejects_garbage(token):
+    with pytest.raises(ValueError):
+        backend.decode_cursor(token)
+
+
+@pytest.fixture
+def sparse_rows(db):
+    # Legacy documents without the sort field, or with it set to null
+    db.sparse.insert_many([{'price': None if i % 5 == 0 else i % 4} if i % 3 else {} for i in range(25)])
+    return db.sparse
+
+
+@pytest.mark.parametrize('direction', [ASCENDING, DESCENDING])
+@pytest.mark.parametrize('limit', [1, 3, 7])
+def test_keyset_pages_cross_missing_and_null_values(sparse_rows, direction, limit):
+    expected = list(sparse_rows.find({}).sort([('price', direction), ('_id', direction)]))
+    seen, cursor = [], None
+    while True:
+        page, cursor = backend.keyset_page(sparse_rows, {}, 'price', limit, cursor, direction=direction)
+        seen += page
+        if cursor is None:
+            break
+    assert [row['_id'] for row in seen] == [row['_id'] for row in expected]
@@ -0,0 +1,73 @@
+import threading
+
+from pubsub import PollingFeed, PubSub
+
+
+def test_burst_is_coalesced_to_the_latest_message():
+    broker = PubSub(coalesce=0)
+    subscription = broker.subscribe(['f1', 'f2'])
+    for passengers in (1, 2, 3):
+        broker.publish('f1', {'passengers': passengers})
+    broker.publish('f2', {'passengers': 7})
+    assert subscription.drain(1) == {'f1': {'passengers': 3}, 'f2': {'passengers': 7}}
+    assert subscription.drain(0.01) == {}
+
+
+def test_publish_only_reaches_watchers_of_the_key():
+    broker = PubSub(coalesce=0)
+    watching, other = broker.subscribe(['f1']), broker.subscribe(['f2'])
+    assert broker.publish('f1', 'update') == 1
+    assert watching.drain(1) == {'f1': 'update'}
+    assert other.drain(0.01) == {}
+
+
+def test_closed_subscription_receives_nothing():
+    broker = PubSub(coalesce=0)
+    subscription = broker.subscribe(['f1'])
+    assert len(broker) == 1
+    subscription.close()
+    subscription.close()
+    assert len(broker) == 0
+    assert broker.publish('f1', 'update') == 0
+
+
+def test_drain_wakes_on_publish():
+    broker = PubSub(coalesce=0)
+    subscription = broker.subscribe(['f1'])
+    timer = threading.Timer(0.05, broker.publish, ('f1', 'update'))
+    timer.start()
+    assert subscription.drain(5) == {'f1': 'update'}
+    timer.join()
+
+
+def test_polling_feed_publishes_only_changes_of_watched_keys():
+    states = {'f1': {'passengers': 1}, 'f2': {'passengers': 5}}
+    fetched = []
+
+    def fetch(keys):
+        fetched.append(sorted(keys))
+        return {key: states[key] for key in keys}
+
+    broker = PubSub(coalesce=0)
+    feed = PollingFeed(broker, fetch)
+    subscription = broker.subscribe(['f1'])
+    feed.remember({'f1': {'passengers': 1}})
+    feed.poll()
+    assert subscription.drain(0.01) == {}
+    states['f1'] = {'passengers': 2}  # Written by another process
+    feed.poll()
+    assert subscription.drain(1) == {'f1': {'passengers': 2}}
+    assert fetched == [['f1'], ['f1']]
+
+
+def test_polling_feed_skips_states_already_observed():
+    broker = PubSub(coalesce=0)
+    feed = PollingFeed(broker, lambda keys: {key: 'same' for key in keys})
+    subscription = broker.subscribe(['f1'])
+    feed.observe('f1', 'same')
+    assert subscription.drain(1) == {'f1': 'same'}
+    feed.poll()
+    assert subscription.drain(0.01) == {}
+    feed.observe('f2', 'unwatched')
+    subscription.close()
+    feed.poll()
@@ -0,0 +1,56 @@
+import datetime
+
+from bson.objectid import ObjectId
+
+import app as backend
+
+
+def insert_flight(db, capacity, passengers=0):
+    return str(db.flights.insert_one({
+        'number': 'TU1', 'departure': 'Tunis', 'arrival': 'Paris',
+        'schedule': datetime.datetime(2025, 6, 1, 10, 30), 'date': '2025-06-01',
+        'capacity': capacity, 'passengers': passengers, 'price_numeric': 150.0, 'duration': 2.5
+    }).inserted_id)
+
+
+def test_reserve_seats_fills_up_to_capacity(db):
+    flight_id = insert_flight(db, capacity=3)
+    assert backend.reserve_seats(flight_id, 2)['passengers'] == 2
+    assert backend.reserve_seats(flight_id, 1)['passengers'] == 3
+
+
+def test_reserve_seats_refuses_overbooking(db):
+    flight_id = insert_flight(db, capacity=3, passengers=2)
+    assert backend.reserve_seats(flight_id, 2) is None
+    assert db.flights.find_one({'_id': ObjectId(flight_id)})['passengers'] == 2
+
+
+def test_reserve_seats_releases_seats(db):
+    flight_id = insert_flight(db, capacity=3, passengers=3)
+    assert backend.reserve_seats(flight_id, 1) is None
+    assert backend.reserve_seats(flight_id, -2)['passengers'] == 1
+    assert backend.reserve_seats(flight_id, 2)['passengers'] == 3
+
+
+def test_reserve_seats_unknown_flight(db):
+    assert backend.reserve_seats(str(ObjectId()), 1) is None
+
+
+def test_booking_context_keeps_reservations_of_deleted_flights(db, monkeypatch):
+    monkeypatch.setattr(backend, 'user_cache', backend.TTLCache(maxsize=10, ttl=60))
+    # mongomock lacks the expression operators of the list projections
+    monkeypatch.setattr(backend, 'FLIGHT_PROJECTION', None)
+    monkeypatch.setattr(backend, 'RESERVATION_PROJECTION', None)
+    user_id = str(db.users.insert_one({'username': 'amine', 'role': 'client', 'password': 'x'}).inserted_id)
+    flight_id = str(ObjectId())  # Never inserted: a deleted flight
+    reservation_id = str(db.reservations.insert_one({'user_id': user_id, 'flight_id': flight_id, 'passengers': 1,
+                                                     'class': 'economique', 'status': 'confirmed'}).inserted_id)
+    client = backend.app.test_client()
+    headers = {'Authorization': f"Bearer {backend.generate_token(user_id, 'client', 'amine')}"}
+
+    response = client.get(f'{backend.API_PREFIX}/booking-context?reservation_id={reservation_id}', headers=headers)
+    assert response.status_code == 200
+    assert response.json['flight'] is None
+    assert [r['_id'] for r in response.json['reservations']] == [reservation_id]
+    response = client.get(f'{backend.API_PREFIX}/booking-context?flight_id={flight_id}', headers=headers)
+    assert response.status_code == 404
@@ -0,0 +1,38 @@
+import datetime
+
+import pytest
+
+from route_search import RouteGraph, make_leg
+
+T0 = datetime.datetime(2025, 6, 1, 8, 0)
+
+
+def flight(flight_id, departure, arrival, start, hours, price=100, **extra):
+    return dict({'_id': flight_id, 'number': flight_id.upper(), 'departure': departure, 'arrival': arrival,
+                 'schedule': start, 'duration': hours, 'price_numeric': price, 'capacity': 100, 'passengers': 0},
+                **extra)
+
+
+@pytest.mark.parametrize('duration', ['2h 30m', 'inf', 'nan', [2]])
+def test_unparsable_flight_is_skipped(duration):
+    assert make_leg(flight('x', 'Tunis', 'Paris', T0, duration)) is None
+
+
+def test_bad_flight_does_not_break_the_graph():
+    graph = RouteGraph()
+    graph.ensure_loaded(lambda: [
+        flight('bad', 'Tunis', 'Paris', T0, '2h 30m'),
+        flight('direct', 'Tunis', 'Paris', T0, 2.5),
+        flight('leg1', 'Tunis', 'Rome', T0, 1.5, price=40),
+        flight('leg2', 'Rome', 'Paris', T0 + datetime.timedelta(hours=3), 2, price=40),
+    ])
+    assert len(graph) == 3
+    itineraries = graph.search('Tunis', 'Paris', T0, T0 + datetime.timedelta(days=1), max_connections=1)
+    assert [[leg['_id'] for leg in it['legs']] for it in itineraries] == [['leg1', 'leg2'], ['direct']]
+
+
+def test_full_flights_are_not_offered():
+    graph = RouteGraph()
+    graph.ensure_loaded(lambda: [flight('full', 'Tunis', 'Paris', T0, 2, passengers=99)])
+    assert graph.search('Tunis', 'Paris', T0, T0 + datetime.timedelta(days=1), passengers=2) == []
+    assert len(graph.search('Tunis', 'Paris', T0, T0 + datetime.timedelta(days=1), passengers=1)) == 1
@@ -0,0 +1,78 @@
+import datetime
+
+import pytest
+
+import app as backend
+
+T0 = datetime.datetime(2030, 6, 1, 8, 0)
+
+
+@pytest.fixture
+def fleet(db, monkeypatch):
+    monkeypatch.setattr(backend, 'built_data', {'search_keys'})
+    db.planes.insert_one(backend.with_search_keys({'registration': 'TS-IMA'}, backend.PLANE_SEARCH_FIELDS))
+    db.crews.insert_one(backend.with_search_keys({'name': 'Équipage 1'}, backend.CREW_SEARCH_FIELDS))
+    db.flights.insert_one(backend.with_search_keys(
+        {'number': 'A', 'plane': 'TS-IMA', 'crew': 'Équipage 1', 'schedule': T0, 'duration': 2.0},
+        backend.FLIGHT_SHADOW_FIELDS))
+    return db
+
+
+def conflicts(start, hours, plane='TS-IMA', crew='Équipage 2', exclude=None):
+    flight = {'plane': plane, 'crew': crew, 'schedule': start, 'duration': hours}
+    return [(c['number'], c['field']) for c in backend.find_schedule_conflicts(flight, exclude)]
+
+
+def test_back_to_back_is_allowed(fleet):
+    assert conflicts(T0 + datetime.timedelta(hours=2), 1) == []
+    assert conflicts(T0 - datetime.timedelta(hours=1), 1) == []
+
+
+def test_overlap_is_reported_per_resource(fleet):
+    assert conflicts(T0 + datetime.timedelta(hours=1), 1) == [('A', 'plane')]
+    assert conflicts(T0 + datetime.timedelta(hours=1), 1, plane='TS-IMB', crew='equipage 1') == [('A', 'crew')]
+
+
+def test_window_inside_a_long_earlier_flight(fleet):
+    fleet.flights.insert_one({'number': 'L', 'plane': 'TS-IMA', 'plane_lc': 'ts-ima',
+                              'schedule': T0 - datetime.timedelta(hours=20), 'duration': 23.0})
+    assert conflicts(T0 + datetime.timedelta(hours=2, minutes=30), 0.5) == [('L', 'plane')]
+
+
+def test_unregistered_names_and_the_edited_flight_are_ignored(fleet):
+    flight_id = str(fleet.flights.find_one({'number': 'A'})['_id'])
+    assert conflicts(T0, 1, plane='Airbus A320') == []
+    assert conflicts(T0, 1, exclude=flight_id) == []
+
+
+def test_flights_written_before_the_upgrade_are_backfilled(fleet, monkeypatch):
+    fleet.flights.insert_one({'number': 'OLD', 'plane': 'TS-IMA', 'schedule': T0 + datetime.timedelta(days=1), 'duration': 1})
+    monkeypatch.setattr(backend, 'built_data', set())
+    assert conflicts(T0 + datetime.timedelta(days=1), 1) == [('OLD', 'plane')]
+
+
+def import_rows(*rows, upsert=False, allow_conflicts=False):
+    summary = {'inserted': 0, 'updated': 0, 'errors': []}
+    batch = [(line, backend.with_search_keys(dict(row, passengers=0, date='2030-01-01'), backend.FLIGHT_SHADOW_FIELDS))
+             for line, row in enumerate(rows, 2)]
+    backend.write_flight_batch(batch, upsert, summary, allow_conflicts)
+    return summary['inserted'], [(error['line'], [c['number'] for c in error['conflicts']]) for error in summary['errors']]
+
+
+def test_import_rejects_rows_double_booking_stored_or_earlier_rows(fleet):
+    rows = [{'number': 'B', 'plane': 'TS-IMA', 'schedule': T0 + datetime.timedelta(hours=1), 'duration': 1.0},
+            {'number': 'C', 'crew': 'Équipage 1', 'schedule': T0 + datetime.timedelta(hours=5), 'duration': 1.0},
+            {'number': 'D', 'crew': 'Équipage 1', 'schedule': T0 + datetime.timedelta(hours=5, minutes=30), 'duration': 1.0}]
+    assert import_rows(*rows) == (1, [(2, ['A']), (4, ['C'])])
+    assert fleet.flights.count_documents({'number': {'$in': ['B', 'D']}}) == 0
+
+
+def test_import_upsert_may_move_a_flight_within_its_own_slot(fleet):
+    row = {'number': 'A', 'plane': 'TS-IMA', 'schedule': T0 + datetime.timedelta(minutes=30), 'duration': 2.0}
+    assert import_rows(row, dict(row, schedule=T0 + datetime.timedelta(hours=1)), upsert=True) == (0, [])
+    assert fleet.flights.find_one({'number': 'A'})['schedule'] == T0 + datetime.timedelta(hours=1)
+
+
+def test_import_allow_conflicts_keeps_every_row(fleet):
+    row = {'number': 'B', 'plane': 'TS-IMA', 'schedule': T0, 'duration': 1.0}
+    assert import_rows(row, allow_conflicts=True) == (1, [])
@@ -0,0 +1,77 @@
+import datetime
+
+import pytest
+
+from schedule_index import MIN_INTERVAL, ScheduleIndex, flight_interval
+
+T0 = datetime.datetime(2025, 6, 1, 10, 0)
+
+
+def flight(flight_id, start, hours, plane='TS-IMA', crew='Équipage 1'):
+    return {'_id': flight_id, 'number': flight_id.upper(), 'plane': plane, 'crew': crew,
+            'schedule': start, 'duration': hours}
+
+
+@pytest.fixture
+def index():
+    schedule = ScheduleIndex(ttl=300)
+    schedule.ensure_loaded(lambda: [
+        flight('a', T0, 2),
+        flight('b', T0 + datetime.timedelta(hours=5), 1, plane='TS-IMB'),
+        flight('long', T0 - datetime.timedelta(days=1), 30, plane='TS-IMC', crew='Équipage 3'),
+    ])
+    return schedule
+
+
+def hours(n):
+    return datetime.timedelta(hours=n)
+
+
+def ids(conflicts):
+    return [conflict['_id'] for conflict in conflicts]
+
+
+def test_back_to_back_flights_do_not_overlap(index):
+    assert index.overlapping('plane', 'TS-IMA', T0 + hours(2), T0 + hours(3)) == []
+    assert index.overlapping('plane', 'TS-IMA', T0 - hours(1), T0) == []
+
+
+def test_one_minute_overlap_is_a_conflict(index):
+    one_minute = datetime.timedelta(minutes=1)
+    assert ids(index.overlapping('plane', 'TS-IMA', T0 + hours(2) - one_minute, T0 + hours(3))) == ['a']
+    assert ids(index.overlapping('plane', 'TS-IMA', T0 - hours(1), T0 + one_minute)) == ['a']
+
+
+def test_window_inside_a_long_flight_is_found(index):
+    assert ids(index.overlapping('plane', 'TS-IMC', T0, T0 + hours(1))) == ['long']
+
+
+def test_matching_ignores_case_and_accents(index):
+    assert ids(index.overlapping('plane', 'ts-ima', T0, T0 + hours(1))) == ['a']
+    assert ids(index.overlapping('crew', 'equipage 1', T0 + hours(5), T0 + hours(6))) == ['b']
+
+
+def test_exclude_skips_the_flight_being_edited(index):
+    assert index.overlapping('plane', 'TS-IMA', T0, T0 + hours(1), exclude='a') == []
+
+
+def test_apply_moves_and_removes_flights(index):
+    moved = flight('a', T0 + hours(10), 2)
+    index.apply([(flight('a', T0, 2), moved)])
+    assert index.overlapping('plane', 'TS-IMA', T0, T0 + hours(1)) == []
+    assert ids(index.overlapping('plane', 'TS-IMA', T0 + hours(11), T0 + hours(12))) == ['a']
+    index.apply([(moved, None)])
+    assert index.overlapping('plane', 'TS-IMA', T0 + hours(11), T0 + hours(12)) == []
+
+
+def test_flight_without_duration_holds_a_minimal_interval():
+    assert flight_interval({'schedule': T0, 'duration': 0}) == (T0, T0 + MIN_INTERVAL)
+    assert flight_interval({'schedule': '2025-06-01T10:00'}) is None
+
+
+@pytest.mark.parametrize('duration', ['2h 30m', float('inf'), [2]])
+def test_unparsable_flight_is_left_out(duration):
+    assert flight_interval({'schedule': T0, 'duration': duration}) is None
+    schedule = ScheduleIndex()
+    schedule.ensure_loaded(lambda: [flight('bad', T0, duration), flight('a', T0, 2)])
+    assert ids(schedule.overlapping('plane', 'TS-IMA', T0, T0 + hours(1))) == ['a']
@@ -0,0 +1,16 @@
+import app as backend
+
+
+def test_stored_copy_carries_the_shadow_values():
+    plane = {'model': 'Airbus A320', 'registration': 'TS-IMA'}
+    stored = backend.with_search_keys(plane, backend.PLANE_SEARCH_FIELDS)
+    assert stored == dict(plane, model_lc='airbus a320', registration_lc='ts-ima')
+    assert 'model_lc' not in plane
+
+
+def test_backfill_fills_legacy_documents(db):
+    db.flights.insert_one({'number': 'TU1', 'company': 'Nouvelair'})
+    db.crews.insert_one({'name': 'Équipage 1', 'mainRole': 'Pilote'})
+    assert backend.backfill_search_keys() == {'flights': 1, 'planes': 0, 'crews': 1}
+    assert db.flights.find_one()['company_lc'] == 'nouvelair'
+    assert db.crews.find_one()['name_lc'] == 'equipage 1'
@@ -0,0 +1,29 @@
+import pytest
+
+import app as backend
+
+
+@pytest.fixture
+def user_id(db, monkeypatch):
+    monkeypatch.setattr(backend, 'user_cache', backend.TTLCache(maxsize=10, ttl=60))
+    monkeypatch.setattr(backend, 'token_cache', backend.TTLCache(maxsize=10, ttl=60))
+    return str(db.users.insert_one({'username': 'amine', 'role': 'client', 'password': 'x'}).inserted_id)
+
+
+def test_profile_is_returned_as_a_copy(user_id):
+    backend.get_user_profile(user_id)['role'] = 'admin'
+    assert backend.get_user_profile(user_id)['role'] == 'client'
+
+
+def test_token_payload_is_returned_as_a_copy(user_id):
+    token = backend.generate_token(user_id, 'client', 'amine')
+    backend.verify_token(token)['role'] = 'admin'
+    assert backend.verify_token(token)['role'] == 'client'
+
+
+def test_invalidate_user_drops_the_cached_profile(db, user_id):
+    backend.get_user_profile(user_id)
+    db.users.update_one({}, {'$set': {'role': 'admin'}})
+    assert backend.get_user_profile(user_id)['role'] == 'client'
+    backend.invalidate_user(user_id)
+    assert backend.get_user_profile(user_id)['role'] == 'admin'
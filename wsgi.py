@@ -0,0 +1,7 @@
+"""Production entry point.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from app import configure_app
+
+app = configure_app()